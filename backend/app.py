@@ -4,26 +4,74 @@ from flask_admin import Admin
 from flask_admin.contrib.sqla import ModelView
 from flask_login import LoginManager, login_required, current_user
 from flask_migrate import Migrate
-from flask_socketio import SocketIO, emit, join_room, leave_room
+from flask_socketio import emit, join_room, leave_room, rooms as joined_rooms
 from datetime import datetime
+from sqlalchemy.orm import selectinload
 import os
-import uuid
+from urllib.parse import quote
 from werkzeug.utils import secure_filename
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 from models import db, Task, TaskFile, User, Project, UserOnlineStatus
-from auth import auth_bp, admin_required, manager_or_admin_required
+from auth import auth_bp, admin_required, manager_or_admin_required, load_user_from_request
+from uploads import uploads_bp, upload_expirer
+from chats import chats_bp, is_participant, user_chat_ids, parse_message, add_message
+from chat_delivery import chat_delivery
+from counters import init_task_counters, compute_task_stats, read_task_stats
+from realtime import (socketio, PRESENCE_ROOM, ALL_TASKS_ROOM, user_room, project_room, chat_room,
+                      task_rooms, task_changes, broadcast_task_event, broadcast_project_task_event,
+                      PROJECT_TASK_FIELDS)
+from presence import presence
+from storage import blob_store, DERIVATIVE_SIZES, derivative_path
+from thumbnails import thumbnails
+from cleanup import file_reaper
+from user_cache import user_cache
+from passwords import password_hasher
+from ratelimit import rate_limiter
+from db_pool import init_db_pool, pool_status, statement_timeout
+from replicas import init_replicas, read_only
+from serializers import (with_task_relations, serialize_tasks, parse_task_fields, paginate_tasks,
+                         visible_tasks)
+from search import init_task_search, match_tasks
+from task_calendar import CALENDAR_FIELDS, parse_range, tasks_in_range, day_buckets
+from dashboard import dashboard_cache
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# X-Sendfile отдается самим send_file
+app.config['USE_X_SENDFILE'] = app.config['FILE_DOWNLOAD_OFFLOAD'] == 'x-sendfile'
+
 # Увеличиваем лимит размера файла до 50MB
+# (файлы больше загружаются по частям через /api/tasks/<id>/uploads)
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
 
+# За reverse proxy адрес клиента и схема берутся из X-Forwarded-*
+if app.config['PROXY_FIX_X_FOR']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'],
+                            x_proto=app.config['PROXY_FIX_X_FOR'])
+
 # Initialize extensions
+init_db_pool(app)
+init_replicas(app)
 db.init_app(app)
 migrate = Migrate(app, db)
-socketio = SocketIO(app, cors_allowed_origins="*")
-CORS(app, supports_credentials=True)
+init_task_counters(app)
+init_task_search(app)
+socketio.init_app(app, cors_allowed_origins="*",
+                  async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+                  message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'])
+presence.init_app(app)
+blob_store.init_app(app)
+thumbnails.init_app(app)
+file_reaper.init_app(app)
+upload_expirer.init_app(app)
+user_cache.init_app(app)
+password_hasher.init_app(app)
+rate_limiter.init_app(app)
+chat_delivery.init_app(app)
+dashboard_cache.init_app(app)
+CORS(app, supports_credentials=True, expose_headers=['X-Next-Cursor'])
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -34,10 +82,16 @@ login_manager.session_protection = 'strong'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Пользователь сессии берется из кэша, без запроса к базе на каждый запрос"""
+    return user_cache.get(int(user_id))
+
+# API-клиенты могут авторизоваться заголовком Authorization: Bearer <token>
+login_manager.request_loader(load_user_from_request)
 
-# Register auth blueprint
+# Register blueprints
 app.register_blueprint(auth_bp)
+app.register_blueprint(uploads_bp)
+app.register_blueprint(chats_bp)
 
 # Initialize Flask-Admin
 admin = Admin(app, name='Task Manager Admin', template_mode='bootstrap3')
@@ -75,6 +129,12 @@ class UserAdminView(ModelView):
     def inaccessible_callback(self, name, **kwargs):
         return jsonify({'error': 'Требуются права администратора'}), 403
     
+    def after_model_change(self, form, model, is_created):
+        user_cache.invalidate(model.id)
+    
+    def after_model_delete(self, model):
+        user_cache.invalidate(model.id)
+    
     column_list = ['id', 'username', 'email', 'role', 'full_name', 'is_active', 'created_at']
     column_searchable_list = ['username', 'email', 'full_name']
     column_filters = ['role', 'is_active', 'created_at']
@@ -99,28 +159,107 @@ admin.add_view(ProjectAdminView(Project, db.session))
 
 @app.route('/api/tasks', methods=['GET'])
 @login_required
+@rate_limiter.limit('tasks')
+@read_only
 def get_tasks():
-    """Получение задач с фильтрацией по ролям"""
+    """Получение задач с фильтрацией по ролям.
+
+    Поддерживает keyset-пагинацию (limit, cursor) и выбор полей (fields=id,title,...).
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    """
     try:
+        try:
+            fields = parse_task_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        limit = request.args.get('limit', app.config['TASKS_PAGE_SIZE'], type=int)
+        limit = max(1, min(limit, app.config['TASKS_MAX_PAGE_SIZE']))
+        
         status = request.args.get('status', 'active')
-        query = Task.query.filter_by(status=status)
-        
-        # Фильтрация по ролям
-        if current_user.role == 'admin':
-            # Админ видит все задачи
-            pass
-        elif current_user.role == 'manager':
-            # Менеджер видит только свои задачи
-            query = query.filter(Task.creator_id == current_user.id)
-        elif current_user.role == 'developer':
-            # Разработчик видит только свои задачи
-            query = query.filter(Task.creator_id == current_user.id)
-        elif current_user.role == 'director':
-            # Директор видит все задачи
-            pass
-        
-        tasks = query.order_by(Task.created_at.desc()).all()
-        return jsonify([task.to_dict() for task in tasks])
+        query = visible_tasks(Task.query.filter_by(status=status), current_user)
+        
+        try:
+            tasks, next_cursor = paginate_tasks(with_task_relations(query, fields),
+                                                request.args.get('cursor'), limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        response = jsonify(serialize_tasks(tasks, fields))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/search', methods=['GET'])
+@login_required
+@rate_limiter.limit('search')
+@read_only
+def search_tasks():
+    """Полнотекстовый поиск задач по заголовку, описанию и ТЗ.
+
+    Параметры: q - поисковый запрос, status - необязательный фильтр по статусу,
+    limit/offset - страница результатов, fields - набор полей как в /api/tasks.
+    Результаты упорядочены по релевантности.
+    """
+    try:
+        phrase = (request.args.get('q') or '').strip()
+        if len(phrase) < 2:
+            return jsonify({'error': 'Слишком короткий запрос'}), 400
+        try:
+            fields = parse_task_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        limit = max(1, min(request.args.get('limit', 20, type=int), app.config['TASKS_SEARCH_MAX_RESULTS']))
+        offset = max(0, min(request.args.get('offset', 0, type=int), app.config['TASKS_SEARCH_MAX_RESULTS']))
+        
+        query = visible_tasks(Task.query, current_user)
+        if request.args.get('status'):
+            query = query.filter(Task.status == request.args['status'])
+        query = match_tasks(query, phrase)
+        if query is None:
+            return jsonify([])
+        
+        tasks = with_task_relations(query, fields).offset(offset).limit(limit).all()
+        return jsonify(serialize_tasks(tasks, fields))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/tasks/range', methods=['GET'])
+@login_required
+@rate_limiter.limit('tasks')
+@read_only
+def get_tasks_range():
+    """Задачи для календаря: только те, чей интервал пересекается с окном.
+
+    Параметры: from, to - первый и последний день окна (YYYY-MM-DD),
+    status - статус задач (по умолчанию active), fields - набор полей как в /api/tasks.
+    Задачи отдаются один раз, а в days для каждого дня окна - id задач этого дня.
+    """
+    try:
+        try:
+            first_day, last_day = parse_range(request.args.get('from'), request.args.get('to'),
+                                              app.config['TASKS_RANGE_MAX_DAYS'])
+            fields = parse_task_fields(request.args.get('fields')) or CALENDAR_FIELDS
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        limit = app.config['TASKS_RANGE_MAX_RESULTS']
+        
+        status = request.args.get('status', 'active')
+        query = visible_tasks(Task.query.filter_by(status=status), current_user)
+        query = tasks_in_range(query, first_day, last_day).order_by(Task.id)
+        tasks = with_task_relations(query, fields).limit(limit + 1).all()
+        
+        # Окно, в которое не уместились все задачи, помечается как неполное
+        truncated = len(tasks) > limit
+        tasks = tasks[:limit]
+        return jsonify({
+            'from': first_day.isoformat(),
+            'to': last_day.isoformat(),
+            'tasks': serialize_tasks(tasks, fields),
+            'days': day_buckets(tasks, first_day, last_day),
+            'truncated': truncated
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -175,7 +314,11 @@ def create_task():
         
         db.session.commit()
         
-        return jsonify(task.to_dict()), 201
+        task_data = task.to_dict()
+        broadcast_task_event('task_created', {'task': task_data}, task_rooms(task))
+        broadcast_project_task_event('created', task_data, {task.project_id})
+        
+        return jsonify(task_data), 201
     except Exception as e:
         db.session.rollback()
         print(f"Ошибка создания задачи: {e}")
@@ -187,6 +330,8 @@ def update_task(task_id):
     try:
         data = request.get_json()
         task = Task.query.get_or_404(task_id)
+        before = task.to_dict()
+        rooms = task_rooms(task)
         
         task.title = data.get('title', task.title)
         task.description = data.get('description', task.description)
@@ -222,7 +367,12 @@ def update_task(task_id):
         
         db.session.commit()
         
-        return jsonify(task.to_dict())
+        task_data = task.to_dict()
+        broadcast_task_event('task_updated', {'id': task.id, 'changes': task_changes(before, task_data)},
+                             rooms | task_rooms(task))
+        broadcast_project_task_event('updated', task_data, {before['projectId'], task.project_id})
+        
+        return jsonify(task_data)
     except Exception as e:
         db.session.rollback()
         print(f"Ошибка обновления задачи {task_id}: {e}")
@@ -236,17 +386,16 @@ def delete_task(task_id):
         if not task:
             return jsonify({'error': 'Task not found'}), 404
             
-        # Удаляем связанные файлы
-        for file in task.files:
-            try:
-                import os
-                if os.path.exists(file.file_path):
-                    os.remove(file.file_path)
-            except Exception as e:
-                print(f"Ошибка удаления файла {file.file_path}: {e}")
-        
+        rooms = task_rooms(task)
+        project_id = task.project_id
+        # Файлы удаляются с диска фоновым сборщиком после коммита
+        file_reaper.enqueue((file.file_path, file.checksum) for file in task.files)
         db.session.delete(task)
         db.session.commit()
+        file_reaper.wake()
+        
+        broadcast_task_event('task_deleted', {'id': task_id}, rooms)
+        broadcast_project_task_event('deleted', {'id': task_id, 'projectId': project_id}, {project_id})
         
         return jsonify({'message': 'Task deleted successfully'})
     except Exception as e:
@@ -259,7 +408,7 @@ def delete_task(task_id):
 def upload_file(task_id):
     """Загрузка файла к задаче"""
     try:
-        Task.query.get_or_404(task_id)
+        task = Task.query.get_or_404(task_id)
         
         if 'file' not in request.files:
             return jsonify({'error': 'No file provided'}), 400
@@ -269,16 +418,10 @@ def upload_file(task_id):
             return jsonify({'error': 'No file selected'}), 400
             
         if file:
-            # Создаем уникальное имя файла
             filename = secure_filename(file.filename)
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            file_path = os.path.join('uploads', unique_filename)
-            
-            # Создаем директорию если не существует
-            os.makedirs('uploads', exist_ok=True)
             
-            # Сохраняем файл
-            file.save(file_path)
+            # Сохраняем файл в хранилище (одинаковое содержимое хранится один раз)
+            file_path, checksum, file_size = blob_store.put_stream(file.stream)
             
             # Получаем тип файла и описание из запроса
             file_type = request.form.get('type', 'attachment')
@@ -287,19 +430,26 @@ def upload_file(task_id):
             # Создаем запись в базе данных
             task_file = TaskFile(
                 task_id=task_id,
-                filename=unique_filename,
+                filename=checksum,
                 original_filename=filename,
                 file_path=file_path,
-                file_size=os.path.getsize(file_path),
+                file_size=file_size,
                 mime_type=file.content_type,
                 file_type=file_type,
-                description=description
+                description=description,
+                checksum=checksum
             )
             
             db.session.add(task_file)
             db.session.commit()
             
-            return jsonify(task_file.to_dict()), 201
+            # Миниатюры для скриншотов строятся в фоне
+            thumbnails.schedule(task_file)
+            
+            file_data = task_file.to_dict()
+            broadcast_task_event('task_file_added', {'taskId': task_id, 'file': file_data}, task_rooms(task))
+            
+            return jsonify(file_data), 201
             
     except Exception as e:
         db.session.rollback()
@@ -312,14 +462,16 @@ def delete_file(file_id):
     """Удаление файла"""
     try:
         file = TaskFile.query.get_or_404(file_id)
+        task_id = file.task_id
+        rooms = task_rooms(file.task)
         
-        # Удаляем файл с диска
-        if os.path.exists(file.file_path):
-            os.remove(file.file_path)
-            
-        # Удаляем запись из базы данных
+        # Удаляем запись из базы данных, файл с диска удалит фоновый сборщик
+        file_reaper.enqueue([(file.file_path, file.checksum)])
         db.session.delete(file)
         db.session.commit()
+        file_reaper.wake()
+        
+        broadcast_task_event('task_file_deleted', {'taskId': task_id, 'fileId': file_id}, rooms)
         
         return jsonify({'message': 'File deleted successfully'})
         
@@ -331,14 +483,46 @@ def delete_file(file_id):
 @app.route('/api/files/<int:file_id>/download', methods=['GET'])
 @login_required
 def download_file_duplicate(file_id):
-    """Скачивание файла"""
+    """Скачивание файла.
+
+    Поддерживаются Range-запросы и условные запросы (ETag по checksum, Last-Modified).
+    ?size=thumb|preview отдает уменьшенную копию изображения, если она уже построена.
+    При FILE_DOWNLOAD_OFFLOAD='x-accel' отдачу файла выполняет nginx через
+    X-Accel-Redirect, при 'x-sendfile' - фронт-сервер через X-Sendfile.
+    """
     try:
         file = TaskFile.query.get_or_404(file_id)
         
         if not os.path.exists(file.file_path):
             return jsonify({'error': 'File not found'}), 404
-            
-        return send_file(file.file_path, as_attachment=True, download_name=file.original_filename)
+        
+        size = request.args.get('size')
+        if size and size not in DERIVATIVE_SIZES:
+            return jsonify({'error': f'Неизвестный размер: {size}'}), 400
+        
+        path = file.file_path
+        mimetype = file.mime_type
+        etag = file.checksum or f'{file.id}-{file.file_size}-{int(file.uploaded_at.timestamp())}'
+        as_attachment = True
+        if size and os.path.exists(derivative_path(file.file_path, size)):
+            path = derivative_path(file.file_path, size)
+            mimetype = 'image/jpeg'
+            etag = f'{etag}-{size}'
+            as_attachment = False
+        
+        if app.config['FILE_DOWNLOAD_OFFLOAD'] == 'x-accel':
+            relative_path = os.path.relpath(path, app.config['UPLOAD_FOLDER'])
+            disposition = 'attachment' if as_attachment else 'inline'
+            response = app.response_class(mimetype=mimetype or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = app.config['FILE_ACCEL_PREFIX'] + quote(relative_path.replace(os.sep, '/'))
+            response.headers['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(file.original_filename)}"
+            response.set_etag(etag)
+            response.last_modified = file.uploaded_at
+            return response.make_conditional(request)
+        
+        return send_file(path, as_attachment=as_attachment, download_name=file.original_filename,
+                         mimetype=mimetype, conditional=True, etag=etag,
+                         last_modified=file.uploaded_at)
         
     except Exception as e:
         print(f"Ошибка скачивания файла: {e}")
@@ -353,6 +537,12 @@ def archive_task(task_id):
         task.updated_at = datetime.utcnow()
         db.session.commit()
         
+        broadcast_task_event('task_updated', {
+            'id': task.id,
+            'changes': {'status': task.status, 'updatedAt': task.updated_at.isoformat()}
+        }, task_rooms(task))
+        broadcast_project_task_event('updated', task.to_dict(PROJECT_TASK_FIELDS), {task.project_id})
+        
         return jsonify({'message': 'Task archived successfully'})
     except Exception as e:
         db.session.rollback()
@@ -363,41 +553,48 @@ def health_check():
     """Проверка состояния API"""
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
+@app.route('/api/admin/db-pool', methods=['GET'])
+@admin_required
+def get_db_pool_status():
+    """Состояние пула соединений с базой в обрабатывающем процессе (только для администраторов)"""
+    return jsonify(pool_status(db.engine))
+
+@app.route('/api/dashboard/summary', methods=['GET'])
+@login_required
+@rate_limiter.limit('tasks')
+def get_dashboard_summary():
+    """Сводка дашборда: счетчики, просроченные и скоро истекающие задачи,
+    последние задачи и распределение по прогрессу.
+
+    Считается с основной базы: сводка кэшируется, и отставание реплики
+    попало бы в кэш до следующего изменения задач.
+    """
+    try:
+        return jsonify(dashboard_cache.summary(current_user))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/stats', methods=['GET'])
 @admin_required
+@statement_timeout(60000)  # без task_counters статистика считается по всей таблице задач
+@read_only
 def get_stats():
-    """Получение статистики задач (только для администраторов)"""
+    """Получение статистики задач (только для администраторов)
+
+    Общие счетчики, счетчики по приоритету активных задач и разбивка
+    по проектам и исполнителям. При TASK_COUNTERS_ENABLED данные читаются
+    из таблицы task_counters, иначе считаются одним GROUP BY.
+    """
     try:
-        # Общее количество задач
-        total = Task.query.count()
-        
-        # Активные задачи
-        active = Task.query.filter_by(status='active').count()
-        
-        # Завершенные задачи
-        completed = Task.query.filter_by(status='completed').count()
-        
-        # Архивированные задачи
-        archived = Task.query.filter_by(status='archived').count()
-        
-        # Задачи по приоритету
-        priority_stats = {}
-        for priority in ['high', 'medium', 'low']:
-            count = Task.query.filter_by(status='active', priority=priority).count()
-            priority_stats[priority] = count
-        
-        return jsonify({
-            'total': total,
-            'active': active,
-            'completed': completed,
-            'archived': archived,
-            'priorityStats': priority_stats
-        })
+        if app.config['TASK_COUNTERS_ENABLED']:
+            return jsonify(read_task_stats())
+        return jsonify(compute_task_stats())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/tasks/<int:task_id>/files', methods=['GET'])
 @login_required
+@read_only
 def get_task_files(task_id):
     """Получение файлов задачи"""
     try:
@@ -410,6 +607,7 @@ def get_task_files(task_id):
 # Project API endpoints
 @app.route('/api/projects', methods=['GET'])
 @login_required
+@read_only
 def get_projects():
     """Получение проектов с фильтрацией по ролям"""
     try:
@@ -426,6 +624,7 @@ def get_projects():
 
 @app.route('/api/users', methods=['GET'])
 @login_required
+@read_only
 def get_users():
     """Получение всех пользователей"""
     try:
@@ -524,18 +723,18 @@ def delete_project(project_id):
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        # Удаляем все задачи проекта
-        for task in project.tasks:
-            # Удаляем связанные файлы
-            for file in task.files:
-                try:
-                    if os.path.exists(file.file_path):
-                        os.remove(file.file_path)
-                except Exception as e:
-                    print(f"Ошибка удаления файла {file.file_path}: {e}")
+        # Удаляем все задачи проекта вместе с записями о файлах;
+        # файлы и исполнители всех задач загружаются двумя запросами
+        tasks = Task.query.filter_by(project_id=project.id).options(
+            selectinload(Task.files), selectinload(Task.assignees)
+        ).all()
+        for task in tasks:
+            file_reaper.enqueue((file.file_path, file.checksum) for file in task.files)
+            db.session.delete(task)
         
         db.session.delete(project)
         db.session.commit()
+        file_reaper.wake()
         
         return jsonify({'message': 'Project deleted successfully'})
     except Exception as e:
@@ -546,34 +745,58 @@ def delete_project(project_id):
 
 @app.route('/api/users/online', methods=['GET'])
 @login_required
+@rate_limiter.limit('online')
 def get_online_users():
-    """Получение списка всех пользователей с их онлайн статусом"""
+    """Получение списка пользователей с их онлайн статусом.
+
+    Пользователи и статусы читаются одним LEFT JOIN; ids=1,2,3 ограничивает выборку.
+    Ответ снабжается ETag, на If-None-Match с тем же значением возвращается 304.
+    """
     try:
-        users = User.query.all()
-        user_list = []
+        query = db.session.query(User, UserOnlineStatus).outerjoin(
+            UserOnlineStatus, UserOnlineStatus.user_id == User.id
+        )
+        
+        if request.args.get('ids'):
+            try:
+                ids = [int(user_id) for user_id in request.args['ids'].split(',') if user_id.strip()]
+            except ValueError:
+                return jsonify({'error': 'Некорректный параметр ids'}), 400
+            query = query.filter(User.id.in_(ids))
         
-        for user in users:
+        rows = query.order_by(User.id).all()
+        # Актуальные статусы берутся из трекера, в базе - последние сохраненные
+        live_statuses = presence.get_statuses([user.id for user, _ in rows])
+        
+        user_list = []
+        for user, online_status in rows:
             user_dict = user.to_dict()
-            
-            # Получаем онлайн статус
-            online_status = UserOnlineStatus.query.filter_by(user_id=user.id).first()
-            if online_status:
+            if user.id in live_statuses:
+                is_online, last_seen = live_statuses[user.id]
+                user_dict['isOnline'] = is_online
+                user_dict['lastSeen'] = last_seen.isoformat()
+            elif online_status:
                 user_dict['isOnline'] = online_status.is_online
                 user_dict['lastSeen'] = online_status.last_seen.isoformat()
             else:
                 user_dict['isOnline'] = False
                 user_dict['lastSeen'] = None
-            
             user_list.append(user_dict)
         
-        return jsonify(user_list)
+        response = jsonify(user_list)
+        response.add_etag()
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/users/<int:user_id>/online', methods=['PUT'])
 @login_required
+@rate_limiter.limit('online')
 def update_online_status(user_id):
-    """Обновление онлайн статуса пользователя"""
+    """Обновление онлайн статуса пользователя.
+
+    Статус хранится в трекере присутствия и попадает в базу фоновой записью.
+    """
     try:
         if current_user.id != user_id:
             return jsonify({'error': 'Unauthorized'}), 403
@@ -581,20 +804,8 @@ def update_online_status(user_id):
         data = request.get_json()
         is_online = data.get('isOnline', True)
         
-        # Находим или создаем запись о статусе
-        online_status = UserOnlineStatus.query.filter_by(user_id=user_id).first()
-        if not online_status:
-            online_status = UserOnlineStatus(user_id=user_id)
-            db.session.add(online_status)
-        
-        online_status.is_online = is_online
-        online_status.last_seen = datetime.utcnow()
-        
-        db.session.commit()
-        
-        return jsonify(online_status.to_dict())
+        return jsonify(presence.set_status(user_id, is_online))
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 # WebSocket events
@@ -602,15 +813,123 @@ def update_online_status(user_id):
 def handle_connect():
     """Обработка подключения клиента"""
     print(f'Client connected: {request.sid}')
+    if current_user.is_authenticated:
+        presence.connect(current_user.id, request.sid)
+        join_room(PRESENCE_ROOM)
+        join_room(user_room(current_user.id))
+        if current_user.role in ['admin', 'director']:
+            join_room(ALL_TASKS_ROOM)
+        for chat_id in user_chat_ids(current_user.id):
+            join_room(chat_room(chat_id))
     emit('connected', {'message': 'Connected to server'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Обработка отключения клиента"""
     print(f'Client disconnected: {request.sid}')
+    chat_delivery.forget(request.sid)
+    if current_user.is_authenticated:
+        presence.disconnect(current_user.id, request.sid)
+
+@socketio.on('join_project')
+def handle_join_project(data):
+    """Подписка на изменения задач проекта (событие project_task со сводными полями)"""
+    if not current_user.is_authenticated:
+        return {'error': 'Пользователь не авторизован'}
+    
+    project_id = data.get('projectId')
+    query = Project.query.filter_by(id=project_id)
+    if current_user.role not in ['admin', 'director']:
+        query = query.filter_by(owner_id=current_user.id)
+    if not query.first():
+        return {'error': 'Project not found'}
+    
+    join_room(project_room(project_id))
+    return {'message': 'Joined'}
+
+@socketio.on('leave_project')
+def handle_leave_project(data):
+    """Отписка от изменений задач проекта"""
+    leave_room(project_room(data.get('projectId')))
+    return {'message': 'Left'}
+
+@socketio.on('join_chat')
+def handle_join_chat(data):
+    """Подписка на чат, созданный после подключения (событие chat_created)"""
+    if not current_user.is_authenticated:
+        return {'error': 'Пользователь не авторизован'}
+    chat_id = data.get('chatId')
+    if not is_participant(chat_id, current_user.id):
+        return {'error': 'Чат не найден'}
+    join_room(chat_room(chat_id))
+    return {'message': 'Joined'}
+
+@socketio.on('leave_chat')
+def handle_leave_chat(data):
+    """Отписка от чата"""
+    leave_room(chat_room(data.get('chatId')))
+    return {'message': 'Left'}
+
+@socketio.on('send_message')
+def handle_send_message(data):
+    """Отправка сообщения в чат; в ответ (ack) приходит сохраненное сообщение.
+
+    Участникам сообщение уходит событием chat_messages вместе с другими
+    сообщениями чата, накопленными за CHAT_DELIVERY_INTERVAL.
+    """
+    if not current_user.is_authenticated:
+        return {'error': 'Пользователь не авторизован'}
+    chat_id = data.get('chatId')
+    if chat_room(chat_id) not in joined_rooms():
+        return {'error': 'Чат не найден'}
+    try:
+        content, message_type = parse_message(data)
+    except ValueError as e:
+        return {'error': str(e)}
+    if not chat_delivery.reserve(request.sid):
+        return {'error': 'Слишком много сообщений, попробуйте позже', 'retry': True}
 
-
+    try:
+        message = add_message(chat_id, current_user.id, content, message_type)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        chat_delivery.cancel(request.sid)
+        return {'error': str(e)}
+    payload = message.to_dict()
+    chat_delivery.publish(payload, request.sid)
+    return {'message': payload}
+
+@socketio.on('chat_read')
+def handle_chat_read(data):
+    """Подтверждение прочтения чата до messageId; записывается пачкой вместе с другими"""
+    if not current_user.is_authenticated:
+        return {'error': 'Пользователь не авторизован'}
+    try:
+        chat_id = int(data.get('chatId'))
+        message_id = int(data.get('messageId'))
+    except (TypeError, ValueError):
+        return {'error': 'Некорректный chatId или messageId'}
+    if chat_room(chat_id) not in joined_rooms():
+        return {'error': 'Чат не найден'}
+    if not chat_delivery.reserve(request.sid):
+        return {'error': 'Слишком много событий, попробуйте позже', 'retry': True}
+    chat_delivery.acknowledge(chat_id, current_user.id, message_id, request.sid)
+    return {'message': 'Accepted'}
+
+
+def start_background_tasks():
+    """Запускает фоновые задачи процесса: онлайн-статусы, удаление файлов и брошенных загрузок, доставку чатов"""
+    presence.start()
+    file_reaper.start()
+    upload_expirer.start()
+    chat_delivery.start()
+
+
+# Сервер разработки; в production backend запускается через gunicorn (см. wsgi.py)
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
-    socketio.run(app, debug=True, host='0.0.0.0', port=5002, allow_unsafe_werkzeug=True)
+    start_background_tasks()
+    socketio.run(app, debug=os.environ.get('FLASK_DEBUG', '1') == '1', host='0.0.0.0',
+                 port=int(os.environ.get('PORT', 5002)), allow_unsafe_werkzeug=True)
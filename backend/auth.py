@@ -1,15 +1,19 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 from datetime import datetime
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from functools import wraps
+import hashlib
 import os
 import uuid
 import secrets
 import string
 # from flask_mail import Mail, Message  # Не используется
 from models import db, User
+from user_cache import user_cache, UserPrincipal
+from passwords import password_hasher
+from ratelimit import rate_limiter
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -19,6 +23,42 @@ def generate_secure_password(length=12):
     password = ''.join(secrets.choice(alphabet) for _ in range(length))
     return password
 
+def _token_serializer(kind):
+    """Сериализатор подписанных токенов; kind - access или refresh"""
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=f'auth-{kind}-token')
+
+def _password_fingerprint(user):
+    """Отпечаток хэша пароля: при смене пароля выданные refresh-токены перестают действовать"""
+    return hashlib.sha256(user.password_hash.encode()).hexdigest()[:16]
+
+def issue_tokens(user):
+    """Выдача пары токенов: короткоживущий access и долгоживущий refresh"""
+    access_token = _token_serializer('access').dumps({'id': user.id, 'role': user.role})
+    refresh_token = _token_serializer('refresh').dumps({'id': user.id, 'pwd': _password_fingerprint(user)})
+    return {
+        'accessToken': access_token,
+        'refreshToken': refresh_token,
+        'tokenType': 'Bearer',
+        'expiresIn': current_app.config['ACCESS_TOKEN_TTL']
+    }
+
+def load_user_from_request(request):
+    """Авторизация по заголовку Authorization: Bearer <access token>.
+
+    Токен содержит id и роль, поэтому пользователь восстанавливается без
+    запроса к базе. Изменения роли и деактивация вступают в силу после
+    истечения токена (ACCESS_TOKEN_TTL).
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        payload = _token_serializer('access').loads(header[len('Bearer '):],
+                                                    max_age=current_app.config['ACCESS_TOKEN_TTL'])
+    except BadSignature:
+        return None
+    return UserPrincipal(payload['id'], payload['role'], True)
+
 def admin_required(f):
     """Декоратор для проверки прав администратора"""
     @wraps(f)
@@ -43,6 +83,7 @@ def login_get():
     return jsonify({'message': 'Use POST method for login'}), 405
 
 @auth_bp.route('/api/auth/login', methods=['POST'])
+@rate_limiter.limit('login', per=('ip',))
 def login():
     """Вход в систему"""
     data = request.get_json()
@@ -52,7 +93,7 @@ def login():
     
     user = User.query.filter_by(username=data['username']).first()
     
-    if user and check_password_hash(user.password_hash, data['password']):
+    if user and password_hasher.verify_and_update(user, data['password']):
         if not user.is_active:
             return jsonify({'error': 'Аккаунт деактивирован'}), 403
         
@@ -69,6 +110,53 @@ def login():
     else:
         return jsonify({'error': 'Неверные учетные данные'}), 401
 
+@auth_bp.route('/api/auth/token', methods=['POST'])
+@rate_limiter.limit('login', per=('ip',))
+def create_token():
+    """Выдача токенов для API-клиентов (без cookie-сессии)"""
+    data = request.get_json()
+    
+    if not data or not data.get('username') or not data.get('password'):
+        return jsonify({'error': 'Необходимы имя пользователя и пароль'}), 400
+    
+    user = User.query.filter_by(username=data['username']).first()
+    
+    if not user or not password_hasher.verify_and_update(user, data['password']):
+        return jsonify({'error': 'Неверные учетные данные'}), 401
+    if not user.is_active:
+        return jsonify({'error': 'Аккаунт деактивирован'}), 403
+    
+    user.last_login = datetime.utcnow()
+    db.session.commit()
+    
+    return jsonify(issue_tokens(user)), 200
+
+@auth_bp.route('/api/auth/token/refresh', methods=['POST'])
+@rate_limiter.limit('login', per=('ip',))
+def refresh_token():
+    """Обновление пары токенов по refresh-токену"""
+    data = request.get_json()
+    
+    if not data or not data.get('refreshToken'):
+        return jsonify({'error': 'Необходим refresh-токен'}), 400
+    
+    try:
+        payload = _token_serializer('refresh').loads(data['refreshToken'],
+                                                     max_age=current_app.config['REFRESH_TOKEN_TTL'])
+    except SignatureExpired:
+        return jsonify({'error': 'Срок действия токена истек'}), 401
+    except BadSignature:
+        return jsonify({'error': 'Недействительный токен'}), 401
+    
+    # Роль и активность перепроверяются по базе при каждом обновлении
+    user = User.query.get(payload['id'])
+    if not user or _password_fingerprint(user) != payload['pwd']:
+        return jsonify({'error': 'Недействительный токен'}), 401
+    if not user.is_active:
+        return jsonify({'error': 'Аккаунт деактивирован'}), 403
+    
+    return jsonify(issue_tokens(user)), 200
+
 @auth_bp.route('/api/auth/logout', methods=['POST'])
 @login_required
 def logout():
@@ -80,8 +168,9 @@ def logout():
 @login_required
 def get_current_user():
     """Получение информации о текущем пользователе"""
+    user = User.query.get_or_404(current_user.id)
     return jsonify({
-        'user': current_user.to_dict()
+        'user': user.to_dict()
     }), 200
 
 @auth_bp.route('/api/auth/profile', methods=['PUT'])
@@ -90,7 +179,7 @@ def update_profile():
     """Обновление профиля пользователя"""
     try:
         data = request.form
-        user = current_user
+        user = User.query.get_or_404(current_user.id)
         
         # Обновляем основные поля
         if data.get('fullName'):
@@ -102,8 +191,8 @@ def update_profile():
         
         # Обновляем пароль если указан
         if data.get('currentPassword') and data.get('newPassword'):
-            if check_password_hash(user.password_hash, data.get('currentPassword')):
-                user.password_hash = generate_password_hash(data.get('newPassword'))
+            if password_hasher.verify(data.get('currentPassword'), user.password_hash):
+                user.password_hash = password_hasher.hash(data.get('newPassword'))
             else:
                 return jsonify({'error': 'Неверный текущий пароль'}), 400
         
@@ -126,6 +215,7 @@ def update_profile():
                 user.avatar_path = avatar_path
         
         db.session.commit()
+        user_cache.invalidate(user.id)
         
         return jsonify({'message': 'Профиль успешно обновлен', 'user': user.to_dict()})
         
@@ -172,7 +262,7 @@ def register():
     user = User(
         username=username,
         email=data['email'],
-        password_hash=generate_password_hash(password),
+        password_hash=password_hasher.hash(password),
         full_name=data['fullName'],
         role=data['role']
     )
@@ -200,10 +290,11 @@ def reset_password(user_id):
         new_password = generate_secure_password()
         
         # Обновляем пароль
-        user.password_hash = generate_password_hash(new_password)
+        user.password_hash = password_hasher.hash(new_password)
         user.updated_at = datetime.utcnow()
         
         db.session.commit()
+        user_cache.invalidate(user.id)
         
         return jsonify({
             'message': 'Пароль успешно сброшен',
@@ -254,9 +345,10 @@ def update_user(user_id):
         user.is_active = data['is_active']
     
     if 'password' in data and data['password']:
-        user.password_hash = generate_password_hash(data['password'])
+        user.password_hash = password_hasher.hash(data['password'])
     
     db.session.commit()
+    user_cache.invalidate(user.id)
     
     return jsonify({
         'message': 'Пользователь успешно обновлен',
@@ -275,6 +367,7 @@ def delete_user(user_id):
     
     db.session.delete(user)
     db.session.commit()
+    user_cache.invalidate(user_id)
     
     return jsonify({'message': 'Пользователь успешно удален'}), 200
 
@@ -287,10 +380,11 @@ def change_password():
     if not data or not all(k in data for k in ('current_password', 'new_password')):
         return jsonify({'error': 'Необходимы текущий и новый пароль'}), 400
     
-    if not check_password_hash(current_user.password_hash, data['current_password']):
+    user = User.query.get_or_404(current_user.id)
+    if not password_hasher.verify(data['current_password'], user.password_hash):
         return jsonify({'error': 'Неверный текущий пароль'}), 400
     
-    current_user.password_hash = generate_password_hash(data['new_password'])
+    user.password_hash = password_hasher.hash(data['new_password'])
     db.session.commit()
     
     return jsonify({'message': 'Пароль успешно изменен'}), 200
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Скрипт для проверки, что списки задач, статистика и файлы задачи
+не замедляются пропорционально размеру таблицы задач.
+
+Таблица заполняется до каждого из размеров (по умолчанию 10 000, 100 000
+и 1 000 000 задач), на каждом размере замеряется медианное время запросов.
+База задается BENCHMARK_DATABASE_URL (по умолчанию файл SQLite во временном
+каталоге); ее таблицы пересоздаются, рабочую базу указывать нельзя.
+
+    python benchmark_task_queries.py [размер ...]
+"""
+
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ['DATABASE_URL'] = os.environ.get('BENCHMARK_DATABASE_URL') or \
+    'sqlite:///' + os.path.join(tempfile.gettempdir(), 'taskmanager_benchmark.db')
+
+from app import app
+from models import db, User, Task, TaskFile, Project, task_assignees
+from serializers import with_task_relations, serialize_tasks, paginate_tasks, encode_task_cursor
+from counters import rebuild_task_counters, read_task_stats, compute_task_stats
+from seed_data import seed_tasks
+
+DEFAULT_SIZES = [10000, 100000, 1000000]
+USERS = 50
+PROJECTS = 20
+BATCH_SIZE = 10000
+REPEATS = 15
+
+# Во сколько раз время может вырасти при росте таблицы в 100 раз
+# (при линейной зависимости оно выросло бы в 100 раз)
+MAX_GROWTH_PER_100X = 5
+
+# Запросы, которые по устройству читают всю таблицу задач (статистика без
+# TASK_COUNTERS_ENABLED): для них проверяется только отсутствие роста хуже линейного
+FULL_SCAN_QUERIES = {'статистика (GROUP BY по задачам)'}
+FULL_SCAN_TOLERANCE = 1.5
+
+
+def seed_users_and_projects():
+    users = [User(username=f'user{i}', email=f'user{i}@example.com', password_hash='-',
+                  full_name=f'Пользователь {i}', role='manager' if i % 5 == 0 else 'developer')
+             for i in range(USERS)]
+    db.session.add_all(users)
+    db.session.flush()
+    projects = [Project(name=f'Проект {i}', owner_id=users[i % USERS].id) for i in range(PROJECTS)]
+    db.session.add_all(projects)
+    db.session.commit()
+    return [(user.id, user.role) for user in users], [project.id for project in projects]
+
+
+def median_time(fn):
+    timings = []
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def measure(users, size):
+    """Медианное время запросов, мс"""
+    manager_id = next(user_id for user_id, role in users if role == 'manager')
+    # Исполнителями seed_tasks назначает только разработчиков
+    developer_id = next(user_id for user_id, role in users if role == 'developer')
+    file_task_id = TaskFile.query.order_by(TaskFile.id).first().task_id
+    middle_task = Task.query.order_by(Task.created_at.desc(), Task.id.desc()).offset(size // 2).first()
+    deep_cursor = encode_task_cursor(middle_task)
+
+    queries = {
+        'список (первая страница)': lambda: serialize_tasks(
+            paginate_tasks(with_task_relations(Task.query.filter_by(status='active')))[0]),
+        'список (середина)': lambda: serialize_tasks(
+            paginate_tasks(with_task_relations(Task.query.filter_by(status='active')), deep_cursor)[0]),
+        'список менеджера': lambda: serialize_tasks(paginate_tasks(with_task_relations(
+            Task.query.filter_by(status='active').filter(Task.created_by == manager_id)))[0]),
+        'статистика (task_counters)': read_task_stats,
+        'статистика (GROUP BY по задачам)': compute_task_stats,
+        'файлы задачи': lambda: [f.to_dict() for f in TaskFile.query.filter_by(task_id=file_task_id).all()],
+        # Обход индекса (user_id, task_id) по убыванию останавливается на первых совпадениях;
+        # страница в 20 задач набирается уже на наименьшей таблице, и объем результата не растет
+        'задачи исполнителя': lambda: Task.query.join(task_assignees).filter(
+            task_assignees.c.user_id == developer_id, Task.status == 'active'
+        ).order_by(task_assignees.c.task_id.desc()).limit(20).all(),
+    }
+    return {name: median_time(fn) * 1000 for name, fn in queries.items()}
+
+
+def benchmark(sizes):
+    rng = random.Random(42)
+    results = {}
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users, project_ids = seed_users_and_projects()
+
+        seeded = 0
+        for size in sizes:
+            print(f"\nЗаполняем таблицу до {size} задач...")
+            seed_tasks(rng, size - seeded, users, project_ids, batch_size=BATCH_SIZE)
+            seeded = size
+            rebuild_task_counters()
+            results[size] = measure(users, size)
+            for name, ms in results[size].items():
+                print(f"  {name}: {ms:.2f} мс")
+        db.drop_all()
+    return results
+
+
+def check_growth(results):
+    """Время не должно расти пропорционально числу строк"""
+    sizes = sorted(results)
+    smallest, largest = sizes[0], sizes[-1]
+    allowed = max(2, MAX_GROWTH_PER_100X * math.log(largest / smallest, 100))
+    allowed_full_scan = FULL_SCAN_TOLERANCE * largest / smallest
+    failed = False
+    print(f"\nРост времени при увеличении таблицы в {largest // smallest} раз (допустимо до {allowed:g}x, "
+          f"для полного прохода по таблице - до {allowed_full_scan:g}x):")
+    for name in results[smallest]:
+        growth = results[largest][name] / max(results[smallest][name], 1e-6)
+        limit = allowed_full_scan if name in FULL_SCAN_QUERIES else allowed
+        mark = 'OK' if growth <= limit else 'FAIL'
+        failed |= growth > limit
+        print(f"  [{mark}] {name}: {growth:.2f}x")
+    return not failed
+
+
+if __name__ == '__main__':
+    sizes = sorted(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+    if not check_growth(benchmark(sizes)):
+        sys.exit(1)
@@ -0,0 +1,169 @@
+import threading
+from collections import defaultdict
+from sqlalchemy import bindparam, case, func, or_, select, update
+from models import db, Chat, ChatMessage, chat_participants
+from realtime import socketio, chat_room
+
+
+class ChatDelivery:
+    """Доставка сообщений чатов и подтверждений прочтения через Socket.IO.
+
+    Новые сообщения копятся по чатам и раз в CHAT_DELIVERY_INTERVAL секунд
+    уходят в комнату чата одним событием chat_messages, так что всплеск
+    сообщений дает одно событие на чат. Подтверждения прочтения сводятся
+    к максимальному id на (чат, пользователь) и раз в CHAT_ACK_FLUSH_INTERVAL
+    секунд записываются двумя UPDATE на всю пачку. Одно соединение может
+    держать в очереди не больше CHAT_MAX_PENDING_PER_CONNECTION событий.
+    """
+
+    def __init__(self):
+        self.delivery_interval = 0.05
+        self.ack_interval = 1
+        self.max_pending = 50
+        self._app = None
+        self._lock = threading.Lock()
+        self._outbox = defaultdict(list)  # chat_id -> [(sid, сообщение)]
+        self._acks = {}                   # (chat_id, user_id) -> message_id
+        self._ack_sids = []
+        self._pending = defaultdict(int)  # sid -> событий в очереди
+        self._started = False
+
+    def init_app(self, app):
+        self._app = app
+        self.delivery_interval = app.config.get('CHAT_DELIVERY_INTERVAL', self.delivery_interval)
+        self.ack_interval = app.config.get('CHAT_ACK_FLUSH_INTERVAL', self.ack_interval)
+        self.max_pending = app.config.get('CHAT_MAX_PENDING_PER_CONNECTION', self.max_pending)
+
+    def reserve(self, sid):
+        """Место в очереди для события соединения; False - соединение должно подождать"""
+        with self._lock:
+            if self._pending[sid] >= self.max_pending:
+                return False
+            self._pending[sid] += 1
+            return True
+
+    def _release(self, sids):
+        for sid in sids:
+            if sid in self._pending:
+                self._pending[sid] -= 1
+                if self._pending[sid] <= 0:
+                    del self._pending[sid]
+
+    def cancel(self, sid):
+        """Возвращает место, занятое reserve, если событие не поставлено в очередь"""
+        with self._lock:
+            self._release([sid])
+
+    def forget(self, sid):
+        """Соединение закрыто: его события остаются в очереди, но больше не учитываются"""
+        with self._lock:
+            self._pending.pop(sid, None)
+
+    def publish(self, message, sid=None):
+        """Ставит сериализованное сообщение в очередь рассылки"""
+        with self._lock:
+            self._outbox[message['chatId']].append((sid, message))
+
+    def acknowledge(self, chat_id, user_id, message_id, sid=None):
+        """Ставит подтверждение прочтения в очередь записи"""
+        with self._lock:
+            key = (chat_id, user_id)
+            self._acks[key] = max(self._acks.get(key, 0), message_id)
+            self._ack_sids.append(sid)
+
+    def flush_messages(self):
+        """Рассылает накопленные сообщения: одно событие на чат"""
+        with self._lock:
+            outbox, self._outbox = self._outbox, defaultdict(list)
+            self._release(sid for items in outbox.values() for sid, _ in items)
+
+        for chat_id, items in outbox.items():
+            socketio.emit('chat_messages', {
+                'chatId': chat_id,
+                'messages': [message for _, message in items]
+            }, to=chat_room(chat_id))
+        return sum(len(items) for items in outbox.values())
+
+    def flush_acks(self):
+        """Записывает накопленные подтверждения одной пачкой и рассылает отметки о прочтении"""
+        with self._lock:
+            acks, self._acks = self._acks, {}
+            sids, self._ack_sids = self._ack_sids, []
+            self._release(sids)
+        if not acks:
+            return 0
+
+        params = [{'b_chat_id': chat_id, 'b_user_id': user_id, 'b_message_id': message_id}
+                  for (chat_id, user_id), message_id in acks.items()]
+        marker = chat_participants.c.last_read_message_id
+        messages = ChatMessage.__table__
+        chats = Chat.__table__
+        # id от клиента не может быть больше последнего сообщения чата,
+        # иначе метка ушла бы дальше будущих сообщений
+        last_message_id = select(func.coalesce(chats.c.last_message_id, 0)).where(
+            chats.c.id == bindparam('b_chat_id')
+        ).scalar_subquery()
+        read_up_to = case((last_message_id < bindparam('b_message_id'), last_message_id),
+                          else_=bindparam('b_message_id'))
+        try:
+            db.session.execute(update(chat_participants).where(
+                chat_participants.c.chat_id == bindparam('b_chat_id'),
+                chat_participants.c.user_id == bindparam('b_user_id'),
+                or_(marker.is_(None), marker < read_up_to)
+            ).values(last_read_message_id=read_up_to), params)
+            db.session.execute(update(messages).where(
+                messages.c.chat_id == bindparam('b_chat_id'),
+                messages.c.id <= read_up_to,
+                messages.c.sender_id != bindparam('b_user_id'),
+                messages.c.is_read.is_(False)
+            ).values(is_read=True), params)
+            db.session.commit()
+        except Exception:
+            # Подтверждения вернутся в очередь и запишутся со следующей пачкой
+            with self._lock:
+                for key, message_id in acks.items():
+                    self._acks[key] = max(self._acks.get(key, 0), message_id)
+            raise
+
+        # Рассылаются сохраненные метки: подтверждение могло быть ограничено или устареть
+        markers = db.session.query(
+            chat_participants.c.chat_id, chat_participants.c.user_id, marker
+        ).filter(
+            chat_participants.c.chat_id.in_({chat_id for chat_id, _ in acks}),
+            chat_participants.c.user_id.in_({user_id for _, user_id in acks})
+        ).all()
+        reads = defaultdict(list)
+        for chat_id, user_id, message_id in markers:
+            if (chat_id, user_id) in acks and message_id is not None:
+                reads[chat_id].append({'userId': user_id, 'messageId': message_id})
+        for chat_id, items in reads.items():
+            socketio.emit('chat_read', {'chatId': chat_id, 'reads': items}, to=chat_room(chat_id))
+        return len(acks)
+
+    def _run_delivery(self):
+        while True:
+            socketio.sleep(self.delivery_interval)
+            try:
+                self.flush_messages()
+            except Exception as e:
+                print(f"Ошибка рассылки сообщений чатов: {e}")
+
+    def _run_acks(self):
+        while True:
+            socketio.sleep(self.ack_interval)
+            with self._app.app_context():
+                try:
+                    self.flush_acks()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Ошибка записи подтверждений прочтения: {e}")
+
+    def start(self):
+        """Запускает фоновую рассылку сообщений и запись подтверждений"""
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run_delivery)
+            socketio.start_background_task(self._run_acks)
+
+
+chat_delivery = ChatDelivery()
@@ -0,0 +1,292 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from datetime import datetime
+from sqlalchemy import and_, case, func, or_, tuple_, update
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, User, Chat, ChatMessage, chat_participants
+from ratelimit import rate_limiter
+from realtime import socketio, user_room
+from chat_delivery import chat_delivery
+from replicas import read_only
+from serializers import encode_cursor, decode_cursor
+
+chats_bp = Blueprint('chats', __name__)
+
+MESSAGE_TYPES = ('text', 'image', 'file')
+
+# Поля пользователя, нужные User.to_short_dict
+SHORT_USER_COLUMNS = (User.id, User.username, User.full_name, User.avatar_path)
+
+
+def _page_limit(setting):
+    limit = request.args.get('limit', current_app.config[setting], type=int)
+    return max(1, min(limit, current_app.config['CHATS_MAX_PAGE_SIZE']))
+
+
+def _read_marker(chat_id, user_id):
+    """Строка участника чата (с меткой прочтения) или None, если пользователь не участник"""
+    return db.session.query(chat_participants.c.last_read_message_id).filter(
+        chat_participants.c.chat_id == chat_id,
+        chat_participants.c.user_id == user_id
+    ).first()
+
+
+def is_participant(chat_id, user_id):
+    return _read_marker(chat_id, user_id) is not None
+
+
+def user_chat_ids(user_id):
+    """id чатов пользователя"""
+    return [row.chat_id for row in db.session.query(chat_participants.c.chat_id).filter(
+        chat_participants.c.user_id == user_id)]
+
+
+def parse_message(data):
+    """(текст, тип) сообщения из тела запроса или события; бросает ValueError"""
+    content = (data.get('content') or '').strip()
+    message_type = data.get('messageType', 'text')
+    if not content:
+        raise ValueError('Пустое сообщение')
+    if message_type not in MESSAGE_TYPES:
+        raise ValueError('Неизвестный тип сообщения')
+    return content, message_type
+
+
+def _find_direct_chat(user_id, other_id):
+    """Существующий чат ровно из двух пользователей"""
+    members = chat_participants.alias('members')
+    row = db.session.query(chat_participants.c.chat_id).join(
+        members, members.c.chat_id == chat_participants.c.chat_id
+    ).filter(
+        chat_participants.c.user_id == user_id
+    ).group_by(chat_participants.c.chat_id).having(and_(
+        func.count() == 2,
+        func.sum(case((members.c.user_id == other_id, 1), else_=0)) == 1
+    )).first()
+    return Chat.query.get(row.chat_id) if row else None
+
+
+def unread_counts(user_id, chat_ids):
+    """Непрочитанные сообщения в чатах: сообщения других участников после метки прочтения.
+
+    Счет идет по индексу (chat_id, id) от метки, поэтому стоит столько,
+    сколько сообщений не прочитано, а не сколько их в истории.
+    """
+    if not chat_ids:
+        return {}
+    rows = db.session.query(ChatMessage.chat_id, func.count(ChatMessage.id)).join(
+        chat_participants, and_(chat_participants.c.chat_id == ChatMessage.chat_id,
+                                chat_participants.c.user_id == user_id)
+    ).filter(
+        ChatMessage.chat_id.in_(chat_ids),
+        ChatMessage.id > func.coalesce(chat_participants.c.last_read_message_id, 0),
+        ChatMessage.sender_id != user_id
+    ).group_by(ChatMessage.chat_id).all()
+    return dict(rows)
+
+
+def advance_read_marker(chat_id, user_id, message_id):
+    """Сдвигает метку прочтения участника вперед (назад она не двигается); True - если сдвинута"""
+    marker = chat_participants.c.last_read_message_id
+    result = db.session.execute(update(chat_participants).where(
+        chat_participants.c.chat_id == chat_id,
+        chat_participants.c.user_id == user_id,
+        or_(marker.is_(None), marker < message_id)
+    ).values(last_read_message_id=message_id))
+    return bool(result.rowcount)
+
+
+def mark_read(chat_id, user_id, message_id):
+    """Сдвигает метку прочтения и отмечает прочитанными сообщения других участников"""
+    moved = advance_read_marker(chat_id, user_id, message_id)
+    if moved:
+        db.session.execute(update(ChatMessage).where(
+            ChatMessage.chat_id == chat_id,
+            ChatMessage.id <= message_id,
+            ChatMessage.sender_id != user_id,
+            ChatMessage.is_read.is_(False)
+        ).values(is_read=True))
+    return moved
+
+
+def add_message(chat_id, sender_id, content, message_type='text'):
+    """Сохраняет сообщение и сдвигает указатель последнего сообщения чата (без commit)"""
+    message = ChatMessage(chat_id=chat_id, sender_id=sender_id, content=content,
+                          message_type=message_type, created_at=datetime.utcnow())
+    db.session.add(message)
+    db.session.flush()
+
+    # Условие на id защищает от гонки двух отправок: указатель только растет
+    db.session.execute(update(Chat).where(
+        Chat.id == chat_id,
+        or_(Chat.last_message_id.is_(None), Chat.last_message_id < message.id)
+    ).values(last_message_id=message.id, updated_at=message.created_at))
+    # Свое сообщение прочитано отправителем; флаги is_read чужих сообщений
+    # выставляют подтверждения прочтения, а не отправка
+    advance_read_marker(chat_id, sender_id, message.id)
+    return message
+
+
+@chats_bp.route('/api/chats', methods=['GET'])
+@login_required
+@read_only
+def get_chats():
+    """Чаты пользователя от недавних к старым.
+
+    Последнее сообщение берется по указателю chats.last_message_id, поэтому
+    стоимость списка не зависит от длины истории. Поддерживает keyset-пагинацию
+    (limit, cursor); курсор следующей страницы - в заголовке X-Next-Cursor.
+    """
+    try:
+        limit = _page_limit('CHATS_PAGE_SIZE')
+        query = Chat.query.join(chat_participants, chat_participants.c.chat_id == Chat.id).filter(
+            chat_participants.c.user_id == current_user.id
+        ).options(
+            selectinload(Chat.participants).load_only(*SHORT_USER_COLUMNS),
+            joinedload(Chat.last_message).joinedload(ChatMessage.sender).load_only(*SHORT_USER_COLUMNS)
+        )
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                updated_at, chat_id = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = query.filter(tuple_(Chat.updated_at, Chat.id) < tuple_(updated_at, chat_id))
+
+        chats = query.order_by(Chat.updated_at.desc(), Chat.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(chats) > limit:
+            chats = chats[:limit]
+            next_cursor = encode_cursor(chats[-1].updated_at, chats[-1].id)
+
+        unread = unread_counts(current_user.id, [chat.id for chat in chats])
+        response = jsonify([chat.to_dict(unread.get(chat.id, 0)) for chat in chats])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@chats_bp.route('/api/chats', methods=['POST'])
+@login_required
+def create_chat():
+    """Создание чата; для двух участников возвращается существующий чат, если он есть"""
+    try:
+        data = request.get_json() or {}
+        participant_ids = {int(user_id) for user_id in data.get('participantIds') or []}
+        participant_ids.discard(current_user.id)
+        if not participant_ids:
+            return jsonify({'error': 'Не указаны участники чата'}), 400
+
+        users = User.query.filter(User.id.in_(participant_ids), User.is_active.is_(True)).all()
+        if len(users) != len(participant_ids):
+            return jsonify({'error': 'Пользователь не найден'}), 404
+
+        if len(users) == 1:
+            chat = _find_direct_chat(current_user.id, users[0].id)
+            if chat:
+                return jsonify(chat.to_dict(unread_counts(current_user.id, [chat.id]).get(chat.id, 0)))
+
+        chat = Chat()
+        chat.participants = users + [User.query.get(current_user.id)]
+        db.session.add(chat)
+        db.session.commit()
+
+        # Клиенты участников подписываются на комнату нового чата через join_chat
+        payload = chat.to_dict()
+        socketio.emit('chat_created', {'chat': payload}, to=[user_room(user.id) for user in chat.participants])
+        return jsonify(payload), 201
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Некорректный список участников'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@chats_bp.route('/api/chats/<int:chat_id>/messages', methods=['GET'])
+@login_required
+@read_only
+def get_chat_messages(chat_id):
+    """История чата от новых сообщений к старым с keyset-пагинацией по (created_at, id)"""
+    try:
+        if not is_participant(chat_id, current_user.id):
+            return jsonify({'error': 'Чат не найден'}), 404
+
+        limit = _page_limit('CHAT_MESSAGES_PAGE_SIZE')
+        query = ChatMessage.query.filter(ChatMessage.chat_id == chat_id).options(
+            joinedload(ChatMessage.sender).load_only(*SHORT_USER_COLUMNS)
+        )
+
+        cursor = request.args.get('cursor')
+        if cursor:
+            try:
+                created_at, message_id = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            query = query.filter(tuple_(ChatMessage.created_at, ChatMessage.id) < tuple_(created_at, message_id))
+
+        messages = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = encode_cursor(messages[-1].created_at, messages[-1].id)
+
+        response = jsonify([message.to_dict() for message in messages])
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@chats_bp.route('/api/chats/<int:chat_id>/messages', methods=['POST'])
+@login_required
+@rate_limiter.limit('messages')
+def send_chat_message(chat_id):
+    """Отправка сообщения в чат"""
+    try:
+        if not is_participant(chat_id, current_user.id):
+            return jsonify({'error': 'Чат не найден'}), 404
+
+        try:
+            content, message_type = parse_message(request.get_json() or {})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        message = add_message(chat_id, current_user.id, content, message_type)
+        db.session.commit()
+        payload = message.to_dict()
+        chat_delivery.publish(payload)
+        return jsonify(payload), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@chats_bp.route('/api/chats/<int:chat_id>/read', methods=['POST'])
+@login_required
+def read_chat(chat_id):
+    """Отметка чата прочитанным до messageId (по умолчанию - до последнего сообщения)"""
+    try:
+        if not is_participant(chat_id, current_user.id):
+            return jsonify({'error': 'Чат не найден'}), 404
+
+        data = request.get_json(silent=True) or {}
+        last_message_id = db.session.query(Chat.last_message_id).filter(Chat.id == chat_id).scalar()
+        if last_message_id:
+            message_id = min(int(data.get('messageId') or last_message_id), last_message_id)
+            mark_read(chat_id, current_user.id, message_id)
+            db.session.commit()
+
+        return jsonify({
+            'chatId': chat_id,
+            'lastReadMessageId': _read_marker(chat_id, current_user.id).last_read_message_id,
+            'unreadCount': unread_counts(current_user.id, [chat_id]).get(chat_id, 0)
+        })
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Некорректный messageId'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,173 @@
+import os
+import time
+from datetime import datetime, timedelta
+from models import db, TaskFile, UploadSession, PendingFileDelete
+from realtime import socketio
+from storage import blob_store, DERIVATIVE_SIZES
+
+# Каталоги внутри UPLOAD_FOLDER, которые не относятся к файлам задач
+SKIP_DIRS = ('avatars',)
+
+# Суффиксы уменьшенных копий (см. storage.derivative_path)
+DERIVATIVE_SUFFIXES = tuple(f'.{size}.jpg' for size in DERIVATIVE_SIZES)
+
+
+class FileReaper:
+    """Фоновое удаление файлов с диска.
+
+    Обработчики удаления записывают файлы в pending_file_deletes в той же
+    транзакции, что и удаление строк, а сборщик пачками удаляет их с диска,
+    повторяя неудачные попытки с нарастающей задержкой.
+    """
+
+    def __init__(self):
+        self.interval = 10
+        self.batch_size = 200
+        self._app = None
+        self._started = False
+        self._wake = None
+
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config.get('FILE_REAPER_INTERVAL', self.interval)
+        self.batch_size = app.config.get('FILE_REAPER_BATCH_SIZE', self.batch_size)
+
+        @app.cli.command('sweep-orphans')
+        def sweep_orphans_command():
+            """Поставить в очередь на удаление файлы uploads/, на которые нет ссылок"""
+            print(f'Найдено файлов без ссылок: {sweep_orphans(app.config["UPLOAD_FOLDER"])}')
+
+        @app.cli.command('reap-files')
+        def reap_files_command():
+            """Обработать очередь удаления файлов"""
+            total = 0
+            while True:
+                processed = self.reap()
+                total += processed
+                if processed < self.batch_size:
+                    break
+            print(f'Обработано файлов: {total}')
+
+    def enqueue(self, files):
+        """Добавляет файлы [(file_path, checksum)] в очередь удаления в текущей транзакции"""
+        for file_path, checksum in files:
+            db.session.add(PendingFileDelete(file_path=file_path, checksum=checksum))
+
+    def wake(self):
+        """Будит сборщик, не дожидаясь следующего интервала"""
+        if self._wake is not None:
+            self._wake.set()
+
+    def reap(self):
+        """Обрабатывает одну пачку очереди; возвращает число обработанных записей"""
+        now = datetime.utcnow()
+        pending = PendingFileDelete.query.filter(
+            PendingFileDelete.next_attempt_at <= now
+        ).order_by(PendingFileDelete.next_attempt_at).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+        for item in pending:
+            try:
+                if blob_store.release(item.file_path, item.checksum):
+                    db.session.delete(item)
+                else:
+                    # Блоб только что переиспользован: ссылка появится или он устареет
+                    item.next_attempt_at = now + timedelta(seconds=blob_store.grace_period)
+            except Exception as e:
+                item.attempts += 1
+                item.last_error = str(e)
+                item.next_attempt_at = now + timedelta(seconds=min(30 * 2 ** item.attempts, 3600))
+                print(f"Ошибка удаления файла {item.file_path}: {e}")
+        db.session.commit()
+        return len(pending)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            with self._app.app_context():
+                try:
+                    while self.reap() == self.batch_size:
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Ошибка обработки очереди удаления файлов: {e}")
+
+    def start(self):
+        """Запускает фоновый сборщик"""
+        if not self._started:
+            self._started = True
+            self._wake = socketio.server.eio.create_event()
+            socketio.start_background_task(self._run)
+
+
+def _walk_files(root):
+    """Обходит файлы каталога потоково, не собирая список целиком"""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+def _orphans_in_batch(paths, upload_dir):
+    """Пути пачки, на которые нет ссылок в task_files и upload_sessions и которых нет в очереди"""
+    referenced = {row.file_path for row in
+                  TaskFile.query.with_entities(TaskFile.file_path).filter(TaskFile.file_path.in_(paths))}
+    referenced.update(row.temp_path for row in
+                      UploadSession.query.with_entities(UploadSession.temp_path).filter(UploadSession.temp_path.in_(paths)))
+    referenced.update(row.file_path for row in
+                      PendingFileDelete.query.with_entities(PendingFileDelete.file_path).filter(PendingFileDelete.file_path.in_(paths)))
+    blobs_dir = os.path.join(upload_dir, 'blobs') + os.sep
+    orphans = []
+    for path in paths:
+        if path in referenced:
+            continue
+        # Для блобов наличие ссылок еще раз проверяется в момент удаления
+        checksum = os.path.basename(path) if path.startswith(blobs_dir) else None
+        orphans.append((path, checksum))
+    return orphans
+
+
+def sweep_orphans(upload_dir, grace_period=timedelta(hours=1), batch_size=500):
+    """Сверяет каталог загрузок с task_files и ставит файлы без ссылок в очередь удаления.
+
+    Каталог обходится потоково, ссылки проверяются пачками по batch_size путей.
+    Файлы моложе grace_period пропускаются: они могут принадлежать загрузке,
+    строка которой еще не закоммичена. Возвращает число найденных файлов.
+    """
+    if not os.path.isdir(upload_dir):
+        return 0
+
+    cutoff = time.time() - grace_period.total_seconds()
+    skip = tuple(os.path.join(upload_dir, name) + os.sep for name in SKIP_DIRS)
+    found = 0
+    batch = set()
+
+    def flush(paths):
+        orphans = _orphans_in_batch(sorted(paths), upload_dir)
+        file_reaper.enqueue(orphans)
+        db.session.commit()
+        return len(orphans)
+
+    for entry in _walk_files(upload_dir):
+        if entry.path.startswith(skip) or entry.stat().st_mtime > cutoff:
+            continue
+        path = entry.path
+        if path.endswith(DERIVATIVE_SUFFIXES):
+            # Уменьшенная копия удаляется вместе с оригиналом, если тот остался без ссылок
+            path = path.rsplit('.', 2)[0]
+            if os.path.exists(path):
+                continue
+        batch.add(path)
+
+        if len(batch) >= batch_size:
+            found += flush(batch)
+            batch = set()
+
+    if batch:
+        found += flush(batch)
+    return found
+
+
+file_reaper = FileReaper()
@@ -9,8 +9,125 @@ class Config:
         'postgresql://maxim@localhost:5432/taskmanager2'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Реплика для чтения (необязательно): списки и статистика читаются с нее.
+    # После изменения данных пользователь REPLICA_READ_AFTER_WRITE секунд читает с основной базы
+    SQLALCHEMY_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URL')
+    REPLICA_READ_AFTER_WRITE = int(os.environ.get('REPLICA_READ_AFTER_WRITE', 5))
+    
+    # Пул соединений PostgreSQL (на процесс): при gunicorn всего соединений до
+    # GUNICORN_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW), это должно укладываться
+    # в max_connections сервера. Ожидание свободного соединения - до DB_POOL_TIMEOUT
+    # секунд, соединения старше DB_POOL_RECYCLE секунд пересоздаются
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    
+    # Таймаут SQL-запросов в обработчиках HTTP-запросов, мс (0 - без ограничения)
+    DB_STATEMENT_TIMEOUT = int(os.environ.get('DB_STATEMENT_TIMEOUT', 15000))
+    
     # Flask-Admin settings
     FLASK_ADMIN_SWATCH = 'cerulean'
     
+    # Время жизни токенов API (секунды): access - короткий, refresh - для его обновления
+    ACCESS_TOKEN_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 15 * 60))
+    REFRESH_TOKEN_TTL = int(os.environ.get('REFRESH_TOKEN_TTL', 30 * 24 * 60 * 60))
+    
+    # Хэширование паролей: алгоритм ('bcrypt' или метод werkzeug, например 'scrypt'),
+    # стоимость bcrypt и число процессов пула (0 - считать в потоке запроса).
+    # Хэши со старыми параметрами пересчитываются при входе пользователя
+    PASSWORD_HASH_ALGORITHM = os.environ.get('PASSWORD_HASH_ALGORITHM', 'bcrypt')
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    
+    # Ограничение частоты запросов: бюджеты маршрутов ('N/second|minute|hour')
+    # и общий Redis для нескольких процессов (по умолчанию - память процесса).
+    # Бюджеты считаются по IP клиента: за reverse proxy задайте PROXY_FIX_X_FOR,
+    # иначе все клиенты делят один бюджет адреса прокси
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+    RATE_LIMITS = {
+        'default': '300/minute',
+        'tasks': '120/minute',
+        'online': '120/minute',
+        'login': '10/minute',
+        'messages': '60/minute',
+        'search': '60/minute',
+    }
+    
+    # Кэш пользователей сессии (на процесс): время жизни записи в секундах и размер
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    
+    # Материализованные счетчики задач для /api/stats (таблица task_counters).
+    # После включения на существующей базе нужно выполнить: flask rebuild-task-counters
+    TASK_COUNTERS_ENABLED = os.environ.get('TASK_COUNTERS_ENABLED', 'false').lower() == 'true'
+    
+    # Онлайн-статусы: период записи last_seen в базу (секунды) и общий Redis
+    # для нескольких процессов (по умолчанию статусы хранятся в памяти процесса)
+    PRESENCE_FLUSH_INTERVAL = int(os.environ.get('PRESENCE_FLUSH_INTERVAL', 30))
+    PRESENCE_REDIS_URL = os.environ.get('PRESENCE_REDIS_URL')
+    
+    # Файлы задач и загрузка по частям (размер части, рекомендуемый клиенту)
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    # Брошенные загрузки по частям: через сколько секунд без новых частей сессия
+    # удаляется и как часто (секунды) их искать
+    UPLOAD_SESSION_TTL = int(os.environ.get('UPLOAD_SESSION_TTL', 24 * 3600))
+    UPLOAD_EXPIRY_INTERVAL = int(os.environ.get('UPLOAD_EXPIRY_INTERVAL', 600))
+    
+    # Отдача файлов фронт-сервером: None - из Flask, 'x-accel' - nginx (X-Accel-Redirect),
+    # 'x-sendfile' - Apache/lighttpd (X-Sendfile). FILE_ACCEL_PREFIX - internal location в nginx
+    FILE_DOWNLOAD_OFFLOAD = os.environ.get('FILE_DOWNLOAD_OFFLOAD') or None
+    FILE_ACCEL_PREFIX = os.environ.get('FILE_ACCEL_PREFIX', '/protected-uploads/')
+    
+    # Фоновое удаление файлов: период опроса очереди (секунды) и размер пачки
+    FILE_REAPER_INTERVAL = int(os.environ.get('FILE_REAPER_INTERVAL', 10))
+    FILE_REAPER_BATCH_SIZE = int(os.environ.get('FILE_REAPER_BATCH_SIZE', 200))
+    # Сколько секунд блоб, переиспользованный загрузкой, защищен от удаления
+    BLOB_GRACE_PERIOD = int(os.environ.get('BLOB_GRACE_PERIOD', 3600))
+    
+    # Число потоков для построения миниатюр скриншотов
+    THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', 2))
+    
+    # Пагинация списка задач
+    TASKS_PAGE_SIZE = int(os.environ.get('TASKS_PAGE_SIZE', 100))
+    TASKS_MAX_PAGE_SIZE = int(os.environ.get('TASKS_MAX_PAGE_SIZE', 500))
+    
+    # Поиск задач: сколько результатов можно пролистать (limit и offset)
+    TASKS_SEARCH_MAX_RESULTS = int(os.environ.get('TASKS_SEARCH_MAX_RESULTS', 100))
+    
+    # Календарь: наибольшее окно в днях (месяц с соседними неделями) и число задач в ответе
+    TASKS_RANGE_MAX_DAYS = int(os.environ.get('TASKS_RANGE_MAX_DAYS', 62))
+    TASKS_RANGE_MAX_RESULTS = int(os.environ.get('TASKS_RANGE_MAX_RESULTS', 2000))
+    
+    # Сводка дашборда: длина списков задач, горизонт "скоро срок" в днях и кэш сводок
+    # (время жизни в секундах, размер; общий Redis для нескольких процессов)
+    DASHBOARD_LIST_SIZE = int(os.environ.get('DASHBOARD_LIST_SIZE', 5))
+    DASHBOARD_DUE_SOON_DAYS = int(os.environ.get('DASHBOARD_DUE_SOON_DAYS', 3))
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 10000))
+    DASHBOARD_CACHE_REDIS_URL = os.environ.get('DASHBOARD_CACHE_REDIS_URL')
+    
+    # Socket.IO в нескольких процессах: очередь сообщений между ними (redis://...)
+    # и режим работы (None - автоматически; gunicorn.conf.py задает его по типу процессов)
+    SOCKETIO_MESSAGE_QUEUE = os.environ.get('SOCKETIO_MESSAGE_QUEUE')
+    SOCKETIO_ASYNC_MODE = os.environ.get('SOCKETIO_ASYNC_MODE') or None
+    
+    # Число reverse proxy перед приложением, которым доверяются заголовки X-Forwarded-*
+    PROXY_FIX_X_FOR = int(os.environ.get('PROXY_FIX_X_FOR', 0))
+    
+    # Пагинация чатов и истории сообщений
+    CHATS_PAGE_SIZE = int(os.environ.get('CHATS_PAGE_SIZE', 30))
+    CHAT_MESSAGES_PAGE_SIZE = int(os.environ.get('CHAT_MESSAGES_PAGE_SIZE', 50))
+    CHATS_MAX_PAGE_SIZE = int(os.environ.get('CHATS_MAX_PAGE_SIZE', 200))
+    
+    # Доставка чатов через Socket.IO: период рассылки накопленных сообщений (секунды),
+    # период записи подтверждений прочтения и лимит событий в очереди на соединение
+    CHAT_DELIVERY_INTERVAL = float(os.environ.get('CHAT_DELIVERY_INTERVAL', 0.05))
+    CHAT_ACK_FLUSH_INTERVAL = float(os.environ.get('CHAT_ACK_FLUSH_INTERVAL', 1))
+    CHAT_MAX_PENDING_PER_CONNECTION = int(os.environ.get('CHAT_MAX_PENDING_PER_CONNECTION', 50))
+    
     # CORS settings
     CORS_ORIGINS = ['http://localhost:3000', 'http://127.0.0.1:3000']
@@ -0,0 +1,218 @@
+from collections import defaultdict
+from sqlalchemy import event, func, inspect, insert, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from models import db, Task, TaskCounter, Project, User
+
+# Атрибуты задачи, от которых зависят счетчики
+COUNTER_ATTRS = ('project_id', 'assignee_id', 'status', 'priority')
+
+# Диалекты с атомарным INSERT ... ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+STATUSES = ('active', 'completed', 'archived')
+PRIORITIES = ('high', 'medium', 'low')
+
+
+def _column_default(attr):
+    default = Task.__table__.c[attr].default
+    return default.arg if default is not None and not callable(default.arg) else None
+
+
+def _current_key(task):
+    """Значения атрибутов задачи, которые будут записаны при flush"""
+    values = []
+    for attr in COUNTER_ATTRS:
+        value = getattr(task, attr)
+        values.append(value if value is not None else _column_default(attr))
+    return tuple(values)
+
+
+def _committed_key(task):
+    """Значения атрибутов задачи, которые сейчас хранятся в базе"""
+    state = inspect(task)
+    values = []
+    for attr in COUNTER_ATTRS:
+        history = state.attrs[attr].history
+        if history.deleted:
+            values.append(history.deleted[0])
+        elif history.unchanged:
+            values.append(history.unchanged[0])
+        else:
+            values.append(getattr(task, attr))
+    return tuple(values)
+
+
+def _scope_keys(key):
+    """Строки счетчиков, в которые попадает задача с данными атрибутами"""
+    project_id, assignee_id, status, priority = key
+    status = status or ''
+    priority = priority or ''
+    keys = [('all', 0, status, priority)]
+    if project_id:
+        keys.append(('project', project_id, status, priority))
+    if assignee_id:
+        keys.append(('assignee', assignee_id, status, priority))
+    return keys
+
+
+def _collect_deltas(session, flush_context, instances):
+    """Перед flush считаем, как изменятся счетчики"""
+    deltas = flush_context.attributes.setdefault('task_counter_deltas', defaultdict(int))
+    # Строки удаляемых проектов и пользователей удаляются целиком: задачи
+    # отвязываются от них уже внутри flush и сюда не попадают
+    dropped = flush_context.attributes.setdefault('task_counter_dropped', [])
+
+    for obj in session.new:
+        if isinstance(obj, Task):
+            for key in _scope_keys(_current_key(obj)):
+                deltas[key] += 1
+
+    for obj in session.deleted:
+        if isinstance(obj, Task):
+            for key in _scope_keys(_committed_key(obj)):
+                deltas[key] -= 1
+        elif isinstance(obj, Project):
+            dropped.append(('project', obj.id))
+        elif isinstance(obj, User):
+            dropped.append(('assignee', obj.id))
+
+    for obj in session.dirty:
+        if isinstance(obj, Task) and session.is_modified(obj):
+            old_key, new_key = _committed_key(obj), _current_key(obj)
+            if old_key == new_key:
+                continue
+            for key in _scope_keys(old_key):
+                deltas[key] -= 1
+            for key in _scope_keys(new_key):
+                deltas[key] += 1
+
+
+def _apply_deltas(session, flush_context):
+    """После flush применяем накопленные изменения в той же транзакции"""
+    deltas = flush_context.attributes.get('task_counter_deltas')
+    dropped = flush_context.attributes.get('task_counter_dropped')
+    if not deltas and not dropped:
+        return
+
+    table = TaskCounter.__table__
+    connection = session.connection()
+    for scope, scope_id in dropped:
+        connection.execute(delete(table).where(table.c.scope == scope, table.c.scope_id == scope_id))
+    # Изменения удаленных областей не записываются: иначе задачи, удаленные
+    # вместе с проектом или исполнителем, создали бы строки с отрицательными счетчиками
+    dropped = set(dropped)
+    rows = [{'scope': scope, 'scope_id': scope_id, 'status': status, 'priority': priority, 'count': delta}
+            for (scope, scope_id, status, priority), delta in deltas.items()
+            if delta != 0 and (scope, scope_id) not in dropped]
+    if not rows:
+        return
+
+    dialect_insert = UPSERT_INSERTS.get(connection.dialect.name)
+    if dialect_insert is not None:
+        # Одновременные flush'и для новой строки не конфликтуют по uq_task_counters_key
+        statement = dialect_insert(table)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['scope', 'scope_id', 'status', 'priority'],
+            set_={'count': table.c.count + statement.excluded.count}
+        ), rows)
+        return
+
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(table.c.scope == row['scope'], table.c.scope_id == row['scope_id'],
+                   table.c.status == row['status'], table.c.priority == row['priority'])
+            .values(count=table.c.count + row['count'])
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**row))
+
+
+def _grouped_task_rows():
+    """Количество задач в разрезе (project_id, assignee_id, status, priority)"""
+    return db.session.query(
+        Task.project_id, Task.assignee_id, Task.status, Task.priority, func.count(Task.id)
+    ).group_by(Task.project_id, Task.assignee_id, Task.status, Task.priority).all()
+
+
+def rebuild_task_counters():
+    """Полный пересчет таблицы счетчиков по таблице задач"""
+    table = TaskCounter.__table__
+    rows = _grouped_task_rows()
+
+    totals = defaultdict(int)
+    for project_id, assignee_id, status, priority, count in rows:
+        for key in _scope_keys((project_id, assignee_id, status, priority)):
+            totals[key] += count
+
+    db.session.execute(delete(table))
+    if totals:
+        db.session.execute(insert(table), [
+            {'scope': scope, 'scope_id': scope_id, 'status': status, 'priority': priority, 'count': count}
+            for (scope, scope_id, status, priority), count in totals.items()
+        ])
+    db.session.commit()
+
+
+def _empty_stats():
+    return {
+        'total': 0,
+        'active': 0,
+        'completed': 0,
+        'archived': 0,
+        'priorityStats': {priority: 0 for priority in PRIORITIES},
+        'byProject': {},
+        'byAssignee': {}
+    }
+
+
+def _add_to_stats(stats, scope, scope_id, status, priority, count):
+    if scope == 'all':
+        stats['total'] += count
+        if status in STATUSES:
+            stats[status] += count
+        if status == 'active' and priority in PRIORITIES:
+            stats['priorityStats'][priority] += count
+        return
+
+    breakdown = stats['byProject' if scope == 'project' else 'byAssignee']
+    bucket = breakdown.setdefault(str(scope_id), {'total': 0, **{s: 0 for s in STATUSES}})
+    bucket['total'] += count
+    if status in STATUSES:
+        bucket[status] += count
+
+
+def compute_task_stats():
+    """Статистика задач одним GROUP BY по таблице задач"""
+    rows = _grouped_task_rows()
+
+    stats = _empty_stats()
+    for project_id, assignee_id, status, priority, count in rows:
+        for key in _scope_keys((project_id, assignee_id, status, priority)):
+            _add_to_stats(stats, *key, count)
+    return stats
+
+
+def read_task_stats():
+    """Статистика задач из материализованной таблицы счетчиков"""
+    stats = _empty_stats()
+    rows = db.session.query(
+        TaskCounter.scope, TaskCounter.scope_id, TaskCounter.status, TaskCounter.priority, TaskCounter.count
+    ).filter(TaskCounter.count != 0).all()
+    for row in rows:
+        _add_to_stats(stats, *row)
+    return stats
+
+
+def init_task_counters(app):
+    """Подключает поддержку таблицы счетчиков, если она включена в конфигурации"""
+
+    @app.cli.command('rebuild-task-counters')
+    def rebuild_task_counters_command():
+        """Пересчитать таблицу task_counters"""
+        rebuild_task_counters()
+        print('Счетчики задач пересчитаны')
+
+    if app.config.get('TASK_COUNTERS_ENABLED'):
+        event.listen(db.session, 'before_flush', _collect_deltas)
+        event.listen(db.session, 'after_flush', _apply_deltas)
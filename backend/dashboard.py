@@ -0,0 +1,219 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import case, event, func, inspect
+from models import db, Task, User
+from serializers import visible_tasks, with_task_relations, serialize_tasks
+
+# Поля задач в списках дашборда
+DASHBOARD_FIELDS = ['id', 'title', 'description', 'status', 'priority', 'progress', 'startDate', 'dueDate',
+                    'gitRepository', 'createdAt', 'updatedAt', 'assigneeName', 'assignees', 'creatorName']
+
+PRIORITIES = ('high', 'medium', 'low')
+
+
+def summary_scope(user):
+    """Область видимости задач пользователя (как в visible_tasks): ключ записи кэша"""
+    if user.role in ('admin', 'director'):
+        return 'all'
+    return f'user:{user.id}'
+
+
+def _task_list(query, user, order_by, limit):
+    query = visible_tasks(query, user).order_by(*order_by)
+    return serialize_tasks(with_task_relations(query, DASHBOARD_FIELDS).limit(limit).all(), DASHBOARD_FIELDS)
+
+
+def compute_summary(user, list_size=5, due_soon_days=3):
+    """Сводка дашборда по задачам, которые видит пользователь"""
+    now = datetime.utcnow()
+    due_soon = now + timedelta(days=due_soon_days)
+    active = Task.status == 'active'
+
+    # Количество задач по статусам и активных - по приоритетам
+    counts = {'total': 0, 'byStatus': {}, 'byPriority': {priority: 0 for priority in PRIORITIES}}
+    rows = visible_tasks(db.session.query(Task.status, Task.priority, func.count(Task.id)), user) \
+        .group_by(Task.status, Task.priority).all()
+    for status, priority, count in rows:
+        counts['total'] += count
+        counts['byStatus'][status] = counts['byStatus'].get(status, 0) + count
+        if status == 'active' and priority in PRIORITIES:
+            counts['byPriority'][priority] += count
+
+    # Активные задачи по ролям исполнителей
+    rows = visible_tasks(
+        db.session.query(User.role, func.count(Task.id)).select_from(Task)
+        .outerjoin(User, Task.assignee_id == User.id).filter(active), user
+    ).group_by(User.role).all()
+    counts['byAssigneeRole'] = {role or 'unassigned': count for role, count in rows}
+
+    # Распределение активных задач по прогрессу
+    rows = visible_tasks(db.session.query(Task.progress, func.count(Task.id)).filter(active), user) \
+        .group_by(Task.progress).all()
+    progress = {}
+    for value, count in rows:
+        progress[value or 'not_started'] = progress.get(value or 'not_started', 0) + count
+
+    # Просроченные и скоро истекающие: оба счетчика одним запросом
+    overdue_count, due_soon_count = visible_tasks(db.session.query(
+        func.count(case((Task.due_date < now, Task.id))),
+        func.count(case((Task.due_date.between(now, due_soon), Task.id)))
+    ).filter(active, Task.due_date < due_soon), user).one()
+
+    return {
+        'counts': counts,
+        'progress': progress,
+        'overdue': {
+            'count': overdue_count,
+            'tasks': _task_list(Task.query.filter(active, Task.due_date < now), user,
+                                (Task.due_date, Task.id), list_size)
+        },
+        'dueSoon': {
+            'count': due_soon_count,
+            'tasks': _task_list(Task.query.filter(active, Task.due_date.between(now, due_soon)), user,
+                                (Task.due_date, Task.id), list_size)
+        },
+        'recent': _task_list(Task.query.filter(active), user,
+                             (Task.created_at.desc(), Task.id.desc()), list_size),
+        'generatedAt': now.isoformat()
+    }
+
+
+class MemorySummaryStore:
+    """Сводки в памяти процесса (LRU с ограниченным временем жизни)"""
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()     # scope -> (версия, сводка, expires_at)
+        self._versions = defaultdict(int)  # scope -> номер сброса
+        self._lock = threading.Lock()
+
+    def version(self, scope):
+        with self._lock:
+            return self._versions[scope]
+
+    def get(self, scope):
+        with self._lock:
+            entry = self._entries.get(scope)
+            if entry and entry[0] == self._versions[scope] and entry[2] > time.monotonic():
+                self._entries.move_to_end(scope)
+                return entry[1]
+        return None
+
+    def set(self, scope, summary, version):
+        with self._lock:
+            # Сводка, посчитанная до сброса, уже устарела
+            if version != self._versions[scope]:
+                return
+            self._entries[scope] = (version, summary, time.monotonic() + self.ttl)
+            self._entries.move_to_end(scope)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] += 1
+                self._entries.pop(scope, None)
+
+
+class RedisSummaryStore:
+    """Сводки в Redis, общие для всех процессов"""
+
+    def __init__(self, url, ttl=60, prefix='dashboard'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self._prefix = prefix
+
+    def _keys(self, scope):
+        return f'{self._prefix}:version:{scope}', f'{self._prefix}:summary:{scope}'
+
+    def version(self, scope):
+        return int(self._redis.get(self._keys(scope)[0]) or 0)
+
+    def get(self, scope):
+        version, data = self._redis.mget(*self._keys(scope))
+        if data:
+            entry = json.loads(data)
+            if entry['version'] == int(version or 0):
+                return entry['summary']
+        return None
+
+    def set(self, scope, summary, version):
+        self._redis.set(self._keys(scope)[1], json.dumps({'version': version, 'summary': summary}), ex=self.ttl)
+
+    def invalidate(self, scopes):
+        pipe = self._redis.pipeline()
+        for scope in scopes:
+            pipe.incr(self._keys(scope)[0])
+        pipe.execute()
+
+
+class DashboardCache:
+    """Кэш сводок дашборда по областям видимости задач.
+
+    Администраторы и директора видят все задачи и делят одну запись, остальные
+    пользователи - по записи на каждого. Коммит, изменивший задачи, сбрасывает
+    записи затронутых областей. Без DASHBOARD_CACHE_REDIS_URL кэш живет в памяти
+    процесса, и в других процессах запись устаревает не позже чем через
+    DASHBOARD_CACHE_TTL секунд.
+    """
+
+    def __init__(self):
+        self.store = MemorySummaryStore()
+        self.list_size = 5
+        self.due_soon_days = 3
+
+    def init_app(self, app):
+        ttl = app.config.get('DASHBOARD_CACHE_TTL', 60)
+        if app.config.get('DASHBOARD_CACHE_REDIS_URL'):
+            self.store = RedisSummaryStore(app.config['DASHBOARD_CACHE_REDIS_URL'], ttl)
+        else:
+            self.store = MemorySummaryStore(ttl, app.config.get('DASHBOARD_CACHE_SIZE', 10000))
+        self.list_size = app.config.get('DASHBOARD_LIST_SIZE', self.list_size)
+        self.due_soon_days = app.config.get('DASHBOARD_DUE_SOON_DAYS', self.due_soon_days)
+
+        event.listen(db.session, 'after_flush', self._collect_scopes)
+        event.listen(db.session, 'after_commit', self._invalidate_committed)
+        event.listen(db.session, 'after_rollback', self._discard_scopes)
+
+    def summary(self, user):
+        """Сводка для пользователя: из кэша или пересчетом"""
+        scope = summary_scope(user)
+        summary = self.store.get(scope)
+        if summary is None:
+            version = self.store.version(scope)
+            summary = compute_summary(user, self.list_size, self.due_soon_days)
+            self.store.set(scope, summary, version)
+        return summary
+
+    def invalidate(self, scopes):
+        self.store.invalidate(scopes)
+
+    def _collect_scopes(self, session, flush_context):
+        """После flush запоминаем области, задачи которых изменились"""
+        scopes = session.info.setdefault('dashboard_scopes', set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, Task):
+                scopes.add('all')
+                # Автор мог смениться: сбрасываются и старая, и новая области
+                scopes.update(f'user:{user_id}' for user_id in inspect(obj).attrs.created_by.history.sum()
+                              if user_id)
+
+    def _invalidate_committed(self, session):
+        scopes = session.info.pop('dashboard_scopes', None)
+        if scopes:
+            try:
+                self.invalidate(scopes)
+            except Exception as e:
+                print(f"Ошибка сброса кэша дашборда: {e}")
+
+    def _discard_scopes(self, session):
+        session.info.pop('dashboard_scopes', None)
+
+
+dashboard_cache = DashboardCache()
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from functools import wraps
+from flask import g, has_request_context, jsonify, current_app
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+from models import db
+
+
+class PoolWaitStats:
+    """Счетчики ожидания свободного соединения в пуле (на процесс)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'waitTotalMs': round(self.wait_total * 1000, 3),
+                'waitAvgMs': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0,
+                'waitMaxMs': round(self.wait_max * 1000, 3),
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool, который считает время ожидания соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+def pool_status(engine):
+    """Состояние пула соединений текущего процесса"""
+    pool = engine.pool
+    status = {'pid': os.getpid(), 'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checkedIn': pool.checkedin(),
+            'checkedOut': pool.checkedout(),
+            'overflow': max(pool.overflow(), 0),
+            'maxOverflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    if isinstance(pool, TimedQueuePool):
+        status['wait'] = pool.wait_stats.to_dict()
+    return status
+
+
+def statement_timeout(milliseconds):
+    """Декоратор: свой таймаут SQL-запросов для маршрута вместо DB_STATEMENT_TIMEOUT"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            g.statement_timeout = milliseconds
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+
+def _set_statement_timeout(session, transaction, connection):
+    # SET LOCAL действует до конца транзакции и не переносится на соединение в пуле
+    if not has_request_context() or connection.dialect.name != 'postgresql':
+        return
+    timeout = g.get('statement_timeout', current_app.config['DB_STATEMENT_TIMEOUT'])
+    if timeout:
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+
+def init_db_pool(app):
+    """Настраивает пул соединений PostgreSQL и таймауты запросов.
+
+    Вызывается до db.init_app: параметры пула попадают в SQLALCHEMY_ENGINE_OPTIONS.
+    Для SQLite (тесты, локальная разработка) пул остается по умолчанию.
+    """
+    if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql'):
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('poolclass', TimedQueuePool)
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', app.config['DB_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', app.config['DB_POOL_PRE_PING'])
+
+    event.listen(db.session, 'after_begin', _set_statement_timeout)
+
+    @app.errorhandler(exc.TimeoutError)
+    def pool_timeout_error(e):
+        # Все соединения заняты дольше DB_POOL_TIMEOUT - просим клиента повторить позже
+        response = jsonify({'error': 'Сервер перегружен, попробуйте позже'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
@@ -0,0 +1,49 @@
+"""Настройки gunicorn для production-запуска backend'а:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Несколько рабочих процессов обмениваются событиями Socket.IO через
+SOCKETIO_MESSAGE_QUEUE (Redis). Клиенты подключаются только по WebSocket,
+поэтому sticky-сессии на балансировщике не нужны.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# По процессу на ядро; в каждом - пул потоков, одно WebSocket-соединение занимает поток
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 100))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Keep-alive за reverse proxy, таймауты и плавная остановка
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Периодический перезапуск процессов (0 - не перезапускать)
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Режим Flask-SocketIO должен совпадать с типом рабочих процессов
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', {
+    'eventlet': 'eventlet',
+    'gevent': 'gevent',
+}.get(worker_class, 'threading'))
+
+
+def worker_exit(server, worker):
+    # Накопленные онлайн-статусы и подтверждения прочтения сохраняются до остановки процесса
+    from app import app, presence, chat_delivery
+    from models import db
+    with app.app_context():
+        for flush in (presence.flush, chat_delivery.flush_acks):
+            try:
+                flush()
+            except Exception as e:
+                db.session.rollback()
+                server.log.warning(f"Ошибка сохранения данных перед остановкой: {e}")
@@ -0,0 +1,33 @@
+"""add task_counters
+
+Revision ID: 3f8c2d1b7e40
+Revises: a093f5a9ea19
+Create Date: 2026-10-18 10:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8c2d1b7e40'
+down_revision = 'a093f5a9ea19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('task_counters',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=20), nullable=False),
+    sa.Column('scope_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('priority', sa.String(length=20), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'scope_id', 'status', 'priority', name='uq_task_counters_key')
+    )
+
+
+def downgrade():
+    op.drop_table('task_counters')
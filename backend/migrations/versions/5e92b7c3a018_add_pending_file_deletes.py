@@ -0,0 +1,37 @@
+"""add pending_file_deletes
+
+Revision ID: 5e92b7c3a018
+Revises: c47d09e5f1a2
+Create Date: 2026-10-18 12:26:08.551947
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e92b7c3a018'
+down_revision = 'c47d09e5f1a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('pending_file_deletes',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('checksum', sa.String(length=64), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('next_attempt_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('pending_file_deletes', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_pending_file_deletes_next_attempt_at'), ['next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('pending_file_deletes', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_pending_file_deletes_next_attempt_at'))
+    op.drop_table('pending_file_deletes')
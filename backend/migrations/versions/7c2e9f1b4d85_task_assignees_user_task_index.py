@@ -0,0 +1,43 @@
+"""order assignee task lookups by task id
+
+Revision ID: 7c2e9f1b4d85
+Revises: d71c3b9a4e26
+Create Date: 2026-10-18 19:04:52.860413
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2e9f1b4d85'
+down_revision = 'd71c3b9a4e26'
+branch_labels = None
+depends_on = None
+
+
+OLD_INDEX = ('ix_task_assignees_user_id', ['user_id'])
+NEW_INDEX = ('ix_task_assignees_user_id_task_id', ['user_id', 'task_id'])
+
+
+def _existing_indexes():
+    # Базы, созданные через db.create_all(), могут уже содержать новый индекс
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('task_assignees')}
+
+
+def _replace_index(drop, create):
+    existing = _existing_indexes()
+    # На PostgreSQL индексы строятся CONCURRENTLY, не блокируя запись в таблицу
+    with op.get_context().autocommit_block():
+        if create[0] not in existing:
+            op.create_index(create[0], 'task_assignees', create[1], unique=False, postgresql_concurrently=True)
+        if drop[0] in existing:
+            op.drop_index(drop[0], table_name='task_assignees', postgresql_concurrently=True)
+
+
+def upgrade():
+    _replace_index(OLD_INDEX, NEW_INDEX)
+
+
+def downgrade():
+    _replace_index(NEW_INDEX, OLD_INDEX)
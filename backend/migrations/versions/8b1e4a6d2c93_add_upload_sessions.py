@@ -0,0 +1,46 @@
+"""add upload_sessions and task_files.checksum
+
+Revision ID: 8b1e4a6d2c93
+Revises: 3f8c2d1b7e40
+Create Date: 2026-10-18 11:03:17.904512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4a6d2c93'
+down_revision = '3f8c2d1b7e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('task_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('original_filename', sa.String(length=255), nullable=False),
+    sa.Column('mime_type', sa.String(length=100), nullable=True),
+    sa.Column('file_type', sa.String(length=50), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('total_size', sa.BigInteger(), nullable=True),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('temp_path', sa.String(length=500), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('task_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('checksum', sa.String(length=64), nullable=True))
+        batch_op.alter_column('file_size', existing_type=sa.Integer(), type_=sa.BigInteger())
+
+
+def downgrade():
+    with op.batch_alter_table('task_files', schema=None) as batch_op:
+        batch_op.alter_column('file_size', existing_type=sa.BigInteger(), type_=sa.Integer())
+        batch_op.drop_column('checksum')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,52 @@
+"""index task list, file and assignee lookups
+
+Revision ID: 9d4f6a2e1b57
+Revises: 5e92b7c3a018
+Create Date: 2026-10-18 13:05:41.307219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f6a2e1b57'
+down_revision = '5e92b7c3a018'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('tasks', 'ix_tasks_status_created_at_id', ['status', 'created_at', 'id']),
+    ('tasks', 'ix_tasks_created_by_status_created_at_id', ['created_by', 'status', 'created_at', 'id']),
+    ('tasks', 'ix_tasks_assignee_id_status', ['assignee_id', 'status']),
+    ('tasks', 'ix_tasks_project_id_status', ['project_id', 'status']),
+    ('task_files', 'ix_task_files_task_id', ['task_id']),
+    ('task_assignees', 'ix_task_assignees_user_id', ['user_id']),
+]
+
+
+def _existing_indexes():
+    # task_assignees нет в начальной миграции, а базы, созданные через
+    # db.create_all(), могут уже содержать эти индексы
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return {table: {index['name'] for index in inspector.get_indexes(table)}
+            for table in {table for table, _, _ in INDEXES} if table in tables}
+
+
+def upgrade():
+    existing = _existing_indexes()
+    # На PostgreSQL индексы строятся CONCURRENTLY, не блокируя запись в таблицы
+    with op.get_context().autocommit_block():
+        for table, name, columns in INDEXES:
+            if table in existing and name not in existing[table]:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for table, name, columns in reversed(INDEXES):
+            if name in existing.get(table, ()):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
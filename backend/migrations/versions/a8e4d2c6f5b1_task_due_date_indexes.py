@@ -0,0 +1,44 @@
+"""index task due dates for the dashboard summary
+
+Revision ID: a8e4d2c6f5b1
+Revises: f3a7c1d9e2b8
+Create Date: 2026-10-18 15:42:18.093764
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8e4d2c6f5b1'
+down_revision = 'f3a7c1d9e2b8'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_tasks_status_due_date', ['status', 'due_date']),
+    ('ix_tasks_created_by_status_due_date', ['created_by', 'status', 'due_date']),
+]
+
+
+def _existing_indexes():
+    # Базы, созданные через db.create_all(), могут уже содержать эти индексы
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('tasks')}
+
+
+def upgrade():
+    existing = _existing_indexes()
+    # На PostgreSQL индексы строятся CONCURRENTLY, не блокируя запись в таблицу
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            if name not in existing:
+                op.create_index(name, 'tasks', columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    existing = _existing_indexes()
+    with op.get_context().autocommit_block():
+        for name, columns in reversed(INDEXES):
+            if name in existing:
+                op.drop_index(name, table_name='tasks', postgresql_concurrently=True)
@@ -0,0 +1,66 @@
+"""task full-text search index
+
+Revision ID: b2d5e8f4a1c6
+Revises: e6a13c8b7d42
+Create Date: 2026-10-18 14:31:07.842590
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d5e8f4a1c6'
+down_revision = 'e6a13c8b7d42'
+branch_labels = None
+depends_on = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian', coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('russian', coalesce(technical_spec, '')), 'C')"
+)
+
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description, technical_spec) "
+    "VALUES (new.id, new.title, new.description, new.technical_spec); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, technical_spec) "
+    "VALUES ('delete', old.id, old.title, old.description, old.technical_spec); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, technical_spec ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, technical_spec) "
+    "VALUES ('delete', old.id, old.title, old.description, old.technical_spec); "
+    "INSERT INTO tasks_fts(rowid, title, description, technical_spec) "
+    "VALUES (new.id, new.title, new.description, new.technical_spec); END",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Вычисляемая колонка заполняется при добавлении и обновляется самой базой
+        op.execute(f"ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                   f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED")
+        with op.get_context().autocommit_block():
+            op.execute("CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_search_vector "
+                       "ON tasks USING gin (search_vector)")
+    elif dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+                   "title, description, technical_spec, content='tasks', content_rowid='id', "
+                   "tokenize='unicode61 remove_diacritics 2')")
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+        op.execute("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tasks_search_vector")
+        op.execute("ALTER TABLE tasks DROP COLUMN IF EXISTS search_vector")
+    elif dialect == 'sqlite':
+        for trigger in ('tasks_fts_insert', 'tasks_fts_delete', 'tasks_fts_update'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS tasks_fts")
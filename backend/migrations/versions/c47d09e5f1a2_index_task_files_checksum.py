@@ -0,0 +1,26 @@
+"""index task_files.checksum
+
+Revision ID: c47d09e5f1a2
+Revises: 8b1e4a6d2c93
+Create Date: 2026-10-18 11:41:52.120734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c47d09e5f1a2'
+down_revision = '8b1e4a6d2c93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('task_files', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_task_files_checksum'), ['checksum'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('task_files', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_task_files_checksum'))
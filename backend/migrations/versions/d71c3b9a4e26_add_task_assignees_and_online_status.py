@@ -0,0 +1,52 @@
+"""add task assignees and user online status tables
+
+Revision ID: d71c3b9a4e26
+Revises: a8e4d2c6f5b1
+Create Date: 2026-10-18 18:20:37.514902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd71c3b9a4e26'
+down_revision = 'a8e4d2c6f5b1'
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables():
+    # Базы, созданные через db.create_all(), уже содержат эти таблицы
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    existing = _existing_tables()
+    if 'task_assignees' not in existing:
+        op.create_table('task_assignees',
+        sa.Column('task_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['task_id'], ['tasks.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('task_id', 'user_id')
+        )
+        op.create_index('ix_task_assignees_user_id', 'task_assignees', ['user_id'], unique=False)
+    if 'user_online_status' not in existing:
+        op.create_table('user_online_status',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('is_online', sa.Boolean(), nullable=True),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id')
+        )
+
+
+def downgrade():
+    existing = _existing_tables()
+    if 'user_online_status' in existing:
+        op.drop_table('user_online_status')
+    if 'task_assignees' in existing:
+        op.drop_table('task_assignees')
@@ -0,0 +1,94 @@
+"""chat last message pointer, read markers and history indexes
+
+Revision ID: e6a13c8b7d42
+Revises: 9d4f6a2e1b57
+Create Date: 2026-10-18 13:48:20.614392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a13c8b7d42'
+down_revision = '9d4f6a2e1b57'
+branch_labels = None
+depends_on = None
+
+
+def _create_chat_tables():
+    op.create_table('chats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('chat_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('chat_id', sa.Integer(), nullable=False),
+    sa.Column('sender_id', sa.Integer(), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('message_type', sa.String(length=20), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('chat_participants',
+    sa.Column('chat_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('last_read_message_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['chat_id'], ['chats.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('chat_id', 'user_id')
+    )
+
+
+def upgrade():
+    # Таблицы чатов раньше создавались только через db.create_all()
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'chats' not in tables:
+        _create_chat_tables()
+    else:
+        with op.batch_alter_table('chats', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('last_message_id', sa.Integer(), nullable=True))
+        with op.batch_alter_table('chat_participants', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('last_read_message_id', sa.Integer(), nullable=True))
+
+        # Указатель на последнее сообщение и метки прочтения по флагу is_read
+        op.execute("""
+            UPDATE chats SET last_message_id = (
+                SELECT MAX(id) FROM chat_messages WHERE chat_messages.chat_id = chats.id
+            )
+        """)
+        op.execute("""
+            UPDATE chat_participants SET last_read_message_id = (
+                SELECT MAX(id) FROM chat_messages
+                WHERE chat_messages.chat_id = chat_participants.chat_id
+                  AND (chat_messages.sender_id = chat_participants.user_id OR chat_messages.is_read)
+            )
+        """)
+
+    with op.batch_alter_table('chats', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_chats_last_message_id', 'chat_messages', ['last_message_id'], ['id'])
+        batch_op.create_index('ix_chats_updated_at_id', ['updated_at', 'id'], unique=False)
+
+    with op.batch_alter_table('chat_participants', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_participants_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_messages_chat_id_created_at_id', ['chat_id', 'created_at', 'id'], unique=False)
+        batch_op.create_index('ix_chat_messages_chat_id_id', ['chat_id', 'id'], unique=False)
+
+
+def downgrade():
+    # Ревизии до этой не создают таблиц чатов: откат возвращает схему без них,
+    # как и при upgrade на базе, где их еще не было
+    with op.batch_alter_table('chats', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_chats_last_message_id', type_='foreignkey')
+
+    op.drop_table('chat_participants')
+    op.drop_table('chat_messages')
+    op.drop_table('chats')
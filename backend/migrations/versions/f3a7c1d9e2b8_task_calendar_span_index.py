@@ -0,0 +1,38 @@
+"""task calendar span index
+
+Revision ID: f3a7c1d9e2b8
+Revises: b2d5e8f4a1c6
+Create Date: 2026-10-18 15:06:42.317905
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a7c1d9e2b8'
+down_revision = 'b2d5e8f4a1c6'
+branch_labels = None
+depends_on = None
+
+
+SPAN_START = "coalesce(start_date, created_at)"
+SPAN_END = f"coalesce(due_date, {SPAN_START})"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_tasks_calendar_span ON tasks USING gist "
+                       f"(tsrange(least({SPAN_START}, {SPAN_END}), greatest({SPAN_START}, {SPAN_END}), '[]'))")
+    elif dialect == 'sqlite':
+        op.execute(f"CREATE INDEX IF NOT EXISTS ix_tasks_calendar_end ON tasks (max({SPAN_START}, {SPAN_END}))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_tasks_calendar_span")
+    elif dialect == 'sqlite':
+        op.execute("DROP INDEX IF EXISTS ix_tasks_calendar_end")
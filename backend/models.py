@@ -1,16 +1,46 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
+from replicas import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 # Промежуточная таблица для связи многие-ко-многим между задачами и исполнителями
 task_assignees = db.Table('task_assignees',
     db.Column('task_id', db.Integer, db.ForeignKey('tasks.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    # Задачи исполнителя от новых к старым (первичный ключ начинается с task_id)
+    db.Index('ix_task_assignees_user_id_task_id', 'user_id', 'task_id')
 )
 
-class User(UserMixin, db.Model):
+class RoleMixin:
+    """Проверки роли пользователя; используются моделью User и UserPrincipal"""
+    
+    def has_role(self, role):
+        """Проверяет, есть ли у пользователя определенная роль"""
+        return self.role == role
+    
+    def is_admin(self):
+        """Проверяет, является ли пользователь администратором"""
+        return self.role == 'admin'
+    
+    def is_manager(self):
+        """Проверяет, является ли пользователь менеджером"""
+        return self.role == 'manager'
+    
+    def is_developer(self):
+        """Проверяет, является ли пользователь разработчиком"""
+        return self.role == 'developer'
+    
+    def is_director(self):
+        """Проверяет, является ли пользователь директором"""
+        return self.role == 'director'
+    
+    def can_view_analytics(self):
+        """Проверяет, может ли пользователь просматривать аналитику"""
+        return self.is_admin() or self.is_director()
+
+class User(RoleMixin, UserMixin, db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
@@ -41,35 +71,31 @@ class User(UserMixin, db.Model):
             'avatarPath': self.avatar_path
         }
     
-    def has_role(self, role):
-        """Проверяет, есть ли у пользователя определенная роль"""
-        return self.role == role
-    
-    def is_admin(self):
-        """Проверяет, является ли пользователь администратором"""
-        return self.role == 'admin'
-    
-    def is_manager(self):
-        """Проверяет, является ли пользователь менеджером"""
-        return self.role == 'manager'
-    
-    def is_developer(self):
-        """Проверяет, является ли пользователь разработчиком"""
-        return self.role == 'developer'
-    
-    def is_director(self):
-        """Проверяет, является ли пользователь директором"""
-        return self.role == 'director'
-    
-    def can_view_analytics(self):
-        """Проверяет, может ли пользователь просматривать аналитику"""
-        return self.is_admin() or self.is_director()
+    def to_short_dict(self):
+        """Пользователь в списках чатов и сообщений: без контактов и служебных полей"""
+        return {
+            'id': self.id,
+            'username': self.username,
+            'fullName': self.full_name,
+            'avatarPath': self.avatar_path
+        }
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Списки задач: фильтр по статусу (и автору) с сортировкой (created_at, id)
+        # для keyset-пагинации, выборки по исполнителю и проекту
+        db.Index('ix_tasks_status_created_at_id', 'status', 'created_at', 'id'),
+        db.Index('ix_tasks_created_by_status_created_at_id', 'created_by', 'status', 'created_at', 'id'),
+        db.Index('ix_tasks_assignee_id_status', 'assignee_id', 'status'),
+        db.Index('ix_tasks_project_id_status', 'project_id', 'status'),
+        # Просроченные и скоро истекающие задачи на дашборде
+        db.Index('ix_tasks_status_due_date', 'status', 'due_date'),
+        db.Index('ix_tasks_created_by_status_due_date', 'created_by', 'status', 'due_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -100,39 +126,46 @@ class Task(db.Model):
     # Связь многие-ко-многим с исполнителями
     assignees = db.relationship('User', secondary=task_assignees, backref=db.backref('tasks_as_assignee', lazy=True))
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'title': self.title,
-            'description': self.description,
-            'status': self.status,
-            'priority': self.priority,
-            'progress': self.progress,
-            'startDate': self.start_date.isoformat() if self.start_date else None,
-            'dueDate': self.due_date.isoformat() if self.due_date else None,
-            'gitRepository': self.git_repository,
-            'serverIp': self.server_ip,
-            'serverPassword': self.server_password,
-            'sshKey': self.ssh_key,
-            'technicalSpec': self.technical_spec,
-            'estimatedHours': self.estimated_hours,
-            'actualHours': self.actual_hours,
-            'createdAt': self.created_at.isoformat(),
-            'updatedAt': self.updated_at.isoformat(),
-            'assigneeId': self.assignee_id,
-            'assigneeName': self.assignee.full_name if self.assignee else None,
-            'assignees': [{'id': user.id, 'fullName': user.full_name, 'username': user.username} for user in self.assignees],
-            'createdBy': self.created_by,
-            'creatorName': self.creator.full_name if self.creator else None,
-            'projectId': self.project_id,
-            'projectName': self.project.name if self.project else None,
-            'files': [file.to_dict() for file in self.files if file.file_type == 'attachment'],
-            'screenshots': [file.to_dict() for file in self.files if file.file_type == 'screenshot']
-        }
+    def to_dict(self, fields=None):
+        """Сериализация задачи; fields ограничивает набор полей ответа"""
+        return {name: TASK_FIELDS[name](self) for name in (fields or TASK_FIELDS)}
     
     def __repr__(self):
         return f'<Task {self.title}>'
 
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+# Поля ответа API для задачи: имя поля -> функция получения значения
+TASK_FIELDS = {
+    'id': lambda task: task.id,
+    'title': lambda task: task.title,
+    'description': lambda task: task.description,
+    'status': lambda task: task.status,
+    'priority': lambda task: task.priority,
+    'progress': lambda task: task.progress,
+    'startDate': lambda task: _isoformat(task.start_date),
+    'dueDate': lambda task: _isoformat(task.due_date),
+    'gitRepository': lambda task: task.git_repository,
+    'serverIp': lambda task: task.server_ip,
+    'serverPassword': lambda task: task.server_password,
+    'sshKey': lambda task: task.ssh_key,
+    'technicalSpec': lambda task: task.technical_spec,
+    'estimatedHours': lambda task: task.estimated_hours,
+    'actualHours': lambda task: task.actual_hours,
+    'createdAt': lambda task: task.created_at.isoformat(),
+    'updatedAt': lambda task: task.updated_at.isoformat(),
+    'assigneeId': lambda task: task.assignee_id,
+    'assigneeName': lambda task: task.assignee.full_name if task.assignee else None,
+    'assignees': lambda task: [{'id': user.id, 'fullName': user.full_name, 'username': user.username} for user in task.assignees],
+    'createdBy': lambda task: task.created_by,
+    'creatorName': lambda task: task.creator.full_name if task.creator else None,
+    'projectId': lambda task: task.project_id,
+    'projectName': lambda task: task.project.name if task.project else None,
+    'files': lambda task: [file.to_dict() for file in task.files if file.file_type == 'attachment'],
+    'screenshots': lambda task: [file.to_dict() for file in task.files if file.file_type == 'screenshot']
+}
+
 class Project(db.Model):
     __tablename__ = 'projects'
     
@@ -166,14 +199,15 @@ class TaskFile(db.Model):
     __tablename__ = 'task_files'
     
     id = db.Column(db.Integer, primary_key=True)
-    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False, index=True)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(500), nullable=False)
-    file_size = db.Column(db.Integer)
+    file_size = db.Column(db.BigInteger)
     mime_type = db.Column(db.String(100))
     file_type = db.Column(db.String(50), default='attachment')  # attachment, screenshot
     description = db.Column(db.Text)  # Описание для скриншотов
+    checksum = db.Column(db.String(64), index=True)  # SHA-256 содержимого, ключ блоба в хранилище
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationship
@@ -189,46 +223,98 @@ class TaskFile(db.Model):
             'mimeType': self.mime_type,
             'fileType': self.file_type,
             'description': self.description,
+            'checksum': self.checksum,
             'uploadedAt': self.uploaded_at.isoformat()
         }
     
     def __repr__(self):
         return f'<TaskFile {self.original_filename}>'
 
+class UploadSession(db.Model):
+    """Незавершенная загрузка файла по частям"""
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(36), primary_key=True)  # UUID, выдается клиенту
+    task_id = db.Column(db.Integer, db.ForeignKey('tasks.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    original_filename = db.Column(db.String(255), nullable=False)
+    mime_type = db.Column(db.String(100))
+    file_type = db.Column(db.String(50), default='attachment')
+    description = db.Column(db.Text)
+    total_size = db.Column(db.BigInteger)  # Заявленный размер, если известен
+    offset = db.Column(db.BigInteger, nullable=False, default=0)  # Сколько байт уже получено
+    temp_path = db.Column(db.String(500), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    task = db.relationship('Task', backref=db.backref('upload_sessions', lazy=True, cascade='all, delete-orphan'))
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'taskId': self.task_id,
+            'originalFilename': self.original_filename,
+            'totalSize': self.total_size,
+            'offset': self.offset,
+            'createdAt': self.created_at.isoformat(),
+            'updatedAt': self.updated_at.isoformat()
+        }
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id}>'
+
 class Chat(db.Model):
     __tablename__ = 'chats'
+    __table_args__ = (
+        db.Index('ix_chats_updated_at_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Последнее сообщение: список чатов не читает историю
+    last_message_id = db.Column(db.Integer, db.ForeignKey('chat_messages.id', use_alter=True,
+                                                          name='fk_chats_last_message_id'))
+    last_message = db.relationship('ChatMessage', foreign_keys=[last_message_id], post_update=True)
+    
     # Участники чата
     participants = db.relationship('User', secondary='chat_participants', backref='chats')
     
-    # Сообщения в чате
-    messages = db.relationship('ChatMessage', backref='chat', lazy=True, cascade='all, delete-orphan')
+    # Сообщения в чате (история читается постранично, см. chats.py)
+    messages = db.relationship('ChatMessage', backref='chat', lazy='dynamic', cascade='all, delete-orphan',
+                               foreign_keys='ChatMessage.chat_id')
     
-    def to_dict(self):
+    def to_dict(self, unread_count=0):
         return {
             'id': self.id,
             'createdAt': self.created_at.isoformat(),
             'updatedAt': self.updated_at.isoformat(),
-            'participants': [user.to_dict() for user in self.participants],
-            'lastMessage': self.messages[-1].to_dict() if self.messages else None,
-            'unreadCount': 0  # Будет вычисляться отдельно
+            'participants': [user.to_short_dict() for user in self.participants],
+            'lastMessage': self.last_message.to_dict() if self.last_message else None,
+            'unreadCount': unread_count
         }
     
     def __repr__(self):
         return f'<Chat {self.id}>'
 
-# Промежуточная таблица для участников чата
+# Промежуточная таблица для участников чата.
+# last_read_message_id - до какого сообщения участник прочитал чат
 chat_participants = db.Table('chat_participants',
     db.Column('chat_id', db.Integer, db.ForeignKey('chats.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('last_read_message_id', db.Integer),
+    # Чаты пользователя (первичный ключ начинается с chat_id)
+    db.Index('ix_chat_participants_user_id', 'user_id')
 )
 
 class ChatMessage(db.Model):
     __tablename__ = 'chat_messages'
+    __table_args__ = (
+        # История чата по (created_at, id) и непрочитанные после id метки прочтения
+        db.Index('ix_chat_messages_chat_id_created_at_id', 'chat_id', 'created_at', 'id'),
+        db.Index('ix_chat_messages_chat_id_id', 'chat_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     chat_id = db.Column(db.Integer, db.ForeignKey('chats.id'), nullable=False)
@@ -246,7 +332,7 @@ class ChatMessage(db.Model):
             'id': self.id,
             'chatId': self.chat_id,
             'senderId': self.sender_id,
-            'sender': self.sender.to_dict() if self.sender else None,
+            'sender': self.sender.to_short_dict() if self.sender else None,
             'content': self.content,
             'messageType': self.message_type,
             'createdAt': self.created_at.isoformat(),
@@ -276,3 +362,39 @@ class UserOnlineStatus(db.Model):
     
     def __repr__(self):
         return f'<UserOnlineStatus {self.user_id}>'
+
+class TaskCounter(db.Model):
+    """Материализованные счетчики задач для /api/stats.
+
+    scope: all - по всем задачам, project - по проекту, assignee - по исполнителю;
+    scope_id - id проекта или исполнителя (0 для all).
+    """
+    __tablename__ = 'task_counters'
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_id', 'status', 'priority', name='uq_task_counters_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(20), nullable=False)
+    scope_id = db.Column(db.Integer, nullable=False, default=0)
+    status = db.Column(db.String(20), nullable=False)
+    priority = db.Column(db.String(20), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TaskCounter {self.scope}:{self.scope_id} {self.status}/{self.priority}={self.count}>'
+
+class PendingFileDelete(db.Model):
+    """Файл, ожидающий удаления с диска фоновым сборщиком"""
+    __tablename__ = 'pending_file_deletes'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    file_path = db.Column(db.String(500), nullable=False)
+    checksum = db.Column(db.String(64))  # Если задан, файл удаляется только без ссылок из task_files
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    
+    def __repr__(self):
+        return f'<PendingFileDelete {self.file_path}>'
@@ -0,0 +1,83 @@
+import bcrypt
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+def _hash_password(password, algorithm, rounds):
+    if algorithm == 'bcrypt':
+        return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+    return generate_password_hash(password, method=algorithm)
+
+
+def _verify_password(password, password_hash):
+    # Хэши bcrypt начинаются с $2a$/$2b$/$2y$, остальные - в формате werkzeug
+    if password_hash.startswith('$2'):
+        return bcrypt.checkpw(password.encode(), password_hash.encode())
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """Хэширование и проверка паролей в отдельном пуле процессов.
+
+    Алгоритм задается PASSWORD_HASH_ALGORITHM ('bcrypt' или метод werkzeug,
+    например 'scrypt', 'pbkdf2:sha256:600000'), стоимость bcrypt - BCRYPT_ROUNDS.
+    Вычисления выполняются в пуле из PASSWORD_HASH_WORKERS процессов, чтобы
+    всплеск входов не занимал потоки, обслуживающие остальные запросы;
+    при PASSWORD_HASH_WORKERS=0 хэш считается в текущем потоке.
+    """
+
+    def __init__(self):
+        self.algorithm = 'bcrypt'
+        self.rounds = 12
+        self.workers = 2
+        self.timeout = 30
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def init_app(self, app):
+        self.algorithm = app.config.get('PASSWORD_HASH_ALGORITHM', self.algorithm)
+        self.rounds = app.config.get('BCRYPT_ROUNDS', self.rounds)
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS', self.workers)
+
+    def _call(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        return self._get_executor().submit(fn, *args).result(timeout=self.timeout)
+
+    def _get_executor(self):
+        # Пул создается один раз на процесс; процессы пула запускаются через spawn,
+        # а не fork: fork многопоточного рабочего процесса копирует чужие блокировки
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def hash(self, password):
+        return self._call(_hash_password, password, self.algorithm, self.rounds)
+
+    def verify(self, password, password_hash):
+        return self._call(_verify_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        """Хэш получен другим алгоритмом или с другой стоимостью"""
+        if self.algorithm == 'bcrypt':
+            return not password_hash.startswith('$2') or int(password_hash.split('$')[2]) != self.rounds
+        method = password_hash.split('$', 1)[0]
+        return not (method == self.algorithm or method.startswith(self.algorithm + ':'))
+
+    def verify_and_update(self, user, password):
+        """Проверяет пароль пользователя и при необходимости перехэширует его
+        текущими параметрами (изменение попадет в базу при следующем commit)"""
+        if not self.verify(password, user.password_hash):
+            return False
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash(password)
+        return True
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,247 @@
+import threading
+from collections import defaultdict
+from datetime import datetime
+from models import db, User, UserOnlineStatus
+from realtime import socketio, PRESENCE_ROOM
+
+
+class MemoryPresenceBackend:
+    """Хранит онлайн-статусы в памяти процесса (для одного процесса)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sids = defaultdict(set)  # user_id -> sid активных подключений
+        self._manual = {}  # user_id -> статус, выставленный через API
+        self._last_seen = {}
+        self._dirty = set()
+
+    def _is_online(self, user_id):
+        return bool(self._sids.get(user_id)) or self._manual.get(user_id, False)
+
+    def connect(self, user_id, sid, now):
+        """Регистрирует подключение; возвращает True, если пользователь стал онлайн"""
+        with self._lock:
+            was_online = self._is_online(user_id)
+            self._sids[user_id].add(sid)
+            self._last_seen[user_id] = now
+            self._dirty.add(user_id)
+            return not was_online
+
+    def disconnect(self, user_id, sid, now):
+        """Снимает подключение; возвращает True, если пользователь стал офлайн"""
+        with self._lock:
+            was_online = self._is_online(user_id)
+            self._sids[user_id].discard(sid)
+            if not self._sids[user_id]:
+                del self._sids[user_id]
+                self._manual.pop(user_id, None)
+            self._last_seen[user_id] = now
+            self._dirty.add(user_id)
+            return was_online and not self._is_online(user_id)
+
+    def set_status(self, user_id, is_online, now):
+        """Явно выставляет статус; возвращает True, если статус изменился"""
+        with self._lock:
+            was_online = self._is_online(user_id)
+            self._manual[user_id] = is_online
+            self._last_seen[user_id] = now
+            self._dirty.add(user_id)
+            return was_online != self._is_online(user_id)
+
+    def get(self, user_ids):
+        """Статусы пользователей: user_id -> (is_online, last_seen)"""
+        with self._lock:
+            return {
+                user_id: (self._is_online(user_id), self._last_seen[user_id])
+                for user_id in user_ids if user_id in self._last_seen
+            }
+
+    def all(self):
+        with self._lock:
+            return self.get(list(self._last_seen))
+
+    def pop_dirty(self):
+        """Забирает id пользователей, чьи статусы еще не записаны в базу"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return dirty
+
+    def mark_dirty(self, user_ids):
+        """Возвращает id в очередь записи (например, после неудачного коммита)"""
+        with self._lock:
+            self._dirty.update(user_ids)
+
+
+class RedisPresenceBackend:
+    """Хранит онлайн-статусы в Redis, общем для всех процессов приложения"""
+
+    def __init__(self, url, prefix='presence'):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self._prefix = prefix
+
+    def _key(self, name, user_id=None):
+        return f'{self._prefix}:{name}' if user_id is None else f'{self._prefix}:{name}:{user_id}'
+
+    def _change(self, user_id, now, update):
+        """Выполняет update(pipe) и возвращает (онлайн до, онлайн после)"""
+        sids_key = self._key('sids', user_id)
+        pipe = self._redis.pipeline()
+        pipe.scard(sids_key)
+        pipe.hget(self._key('manual'), user_id)
+        update(pipe)
+        pipe.hset(self._key('last_seen'), user_id, now.isoformat())
+        pipe.sadd(self._key('dirty'), user_id)
+        pipe.scard(sids_key)
+        pipe.hget(self._key('manual'), user_id)
+        results = pipe.execute()
+        before = results[0] > 0 or results[1] == '1'
+        after = results[-2] > 0 or results[-1] == '1'
+        return before, after
+
+    def connect(self, user_id, sid, now):
+        before, after = self._change(user_id, now, lambda pipe: pipe.sadd(self._key('sids', user_id), sid))
+        return after and not before
+
+    def disconnect(self, user_id, sid, now):
+        before, after = self._change(user_id, now, lambda pipe: pipe.srem(self._key('sids', user_id), sid))
+        if not self._redis.scard(self._key('sids', user_id)):
+            self._redis.hdel(self._key('manual'), user_id)
+            after = False
+        return before and not after
+
+    def set_status(self, user_id, is_online, now):
+        before, after = self._change(
+            user_id, now, lambda pipe: pipe.hset(self._key('manual'), user_id, '1' if is_online else '0')
+        )
+        return before != after
+
+    def get(self, user_ids):
+        user_ids = list(user_ids)
+        if not user_ids:
+            return {}
+        pipe = self._redis.pipeline()
+        for user_id in user_ids:
+            pipe.scard(self._key('sids', user_id))
+        pipe.hmget(self._key('manual'), user_ids)
+        pipe.hmget(self._key('last_seen'), user_ids)
+        results = pipe.execute()
+        counts, manual, last_seen = results[:-2], results[-2], results[-1]
+        return {
+            user_id: (counts[i] > 0 or manual[i] == '1', datetime.fromisoformat(last_seen[i]))
+            for i, user_id in enumerate(user_ids) if last_seen[i]
+        }
+
+    def all(self):
+        return self.get(int(user_id) for user_id in self._redis.hkeys(self._key('last_seen')))
+
+    def pop_dirty(self):
+        pipe = self._redis.pipeline()
+        pipe.smembers(self._key('dirty'))
+        pipe.delete(self._key('dirty'))
+        dirty, _ = pipe.execute()
+        return {int(user_id) for user_id in dirty}
+
+    def mark_dirty(self, user_ids):
+        user_ids = list(user_ids)
+        if user_ids:
+            self._redis.sadd(self._key('dirty'), *user_ids)
+
+
+class PresenceTracker:
+    """Онлайн-статусы пользователей по подключениям Socket.IO.
+
+    Статусы живут в памяти (или в Redis при PRESENCE_REDIS_URL), изменения
+    рассылаются в комнату presence, а last_seen пишется в user_online_status
+    пачкой раз в PRESENCE_FLUSH_INTERVAL секунд.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryPresenceBackend()
+        self.flush_interval = 30
+        self._app = None
+        self._flusher_started = False
+
+    def init_app(self, app):
+        self._app = app
+        self.flush_interval = app.config.get('PRESENCE_FLUSH_INTERVAL', self.flush_interval)
+        if app.config.get('PRESENCE_REDIS_URL'):
+            self.backend = RedisPresenceBackend(app.config['PRESENCE_REDIS_URL'])
+
+    def _publish(self, user_id, is_online, now):
+        socketio.emit('presence', {
+            'userId': user_id,
+            'isOnline': is_online,
+            'lastSeen': now.isoformat()
+        }, to=PRESENCE_ROOM)
+
+    def connect(self, user_id, sid):
+        now = datetime.utcnow()
+        if self.backend.connect(user_id, sid, now):
+            self._publish(user_id, True, now)
+
+    def disconnect(self, user_id, sid):
+        now = datetime.utcnow()
+        if self.backend.disconnect(user_id, sid, now):
+            self._publish(user_id, False, now)
+
+    def set_status(self, user_id, is_online):
+        """Явная установка статуса через API; возвращает словарь статуса"""
+        now = datetime.utcnow()
+        if self.backend.set_status(user_id, is_online, now):
+            self._publish(user_id, is_online, now)
+        is_online, last_seen = self.backend.get([user_id])[user_id]
+        return {'userId': user_id, 'isOnline': is_online, 'lastSeen': last_seen.isoformat()}
+
+    def get_statuses(self, user_ids=None):
+        """Текущие статусы: user_id -> (is_online, last_seen)"""
+        if user_ids is None:
+            return self.backend.all()
+        return self.backend.get(user_ids)
+
+    def flush(self):
+        """Записывает накопленные статусы в user_online_status одной транзакцией"""
+        dirty = self.backend.pop_dirty()
+        statuses = self.backend.get(dirty)
+        if not statuses:
+            return 0
+
+        try:
+            # Пользователи, удаленные после изменения статуса, не записываются:
+            # строка с их id не прошла бы внешний ключ и сорвала бы всю пачку
+            existing = {row.id for row in User.query.with_entities(User.id).filter(User.id.in_(list(statuses)))}
+            statuses = {user_id: status for user_id, status in statuses.items() if user_id in existing}
+            rows = {row.user_id: row for row in
+                    UserOnlineStatus.query.filter(UserOnlineStatus.user_id.in_(list(statuses))).all()}
+            for user_id, (is_online, last_seen) in statuses.items():
+                row = rows.get(user_id)
+                if not row:
+                    row = UserOnlineStatus(user_id=user_id)
+                    db.session.add(row)
+                row.is_online = is_online
+                row.last_seen = last_seen
+            db.session.commit()
+        except Exception:
+            # Статусы вернутся в очередь и запишутся со следующей пачкой
+            self.backend.mark_dirty(dirty)
+            raise
+        return len(statuses)
+
+    def _run_flusher(self):
+        while True:
+            socketio.sleep(self.flush_interval)
+            with self._app.app_context():
+                try:
+                    self.flush()
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Ошибка сохранения онлайн статусов: {e}")
+
+    def start(self):
+        """Запускает фоновую запись статусов в базу"""
+        if not self._flusher_started:
+            self._flusher_started = True
+            socketio.start_background_task(self._run_flusher)
+
+
+presence = PresenceTracker()
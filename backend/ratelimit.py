@@ -0,0 +1,131 @@
+import math
+import threading
+import time
+from functools import wraps
+from flask import request, jsonify, current_app
+from flask_login import current_user
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_budget(value):
+    """'120/minute' -> (скорость пополнения в токенах/сек, емкость корзины)"""
+    count, period = value.split('/')
+    count = int(count)
+    return count / PERIODS[period.strip()], count
+
+
+class MemoryBucketStore:
+    """Корзины токенов в памяти процесса"""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = {}  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, key, rate, burst, now):
+        """Списывает токен; возвращает (разрешено, через сколько секунд повторить)"""
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (1 - tokens) / rate
+            if len(self._buckets) > self.max_keys:
+                self._prune(now, burst / rate)
+            return allowed, retry_after
+
+    def _prune(self, now, refill_time):
+        # Корзины, которые успели бы заполниться целиком, не отличаются от новых
+        for key in [key for key, (_, updated_at) in self._buckets.items() if now - updated_at > refill_time]:
+            del self._buckets[key]
+
+
+class RedisBucketStore:
+    """Корзины токенов в Redis, общие для всех процессов"""
+
+    SCRIPT = """
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local tokens = tonumber(data[1]) or burst
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url, prefix='ratelimit'):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+        self._prefix = prefix
+
+    def take(self, key, rate, burst, now):
+        allowed, retry_after = self._script(keys=[f'{self._prefix}:{key}'], args=[rate, burst, now])
+        return bool(allowed), float(retry_after)
+
+
+class RateLimiter:
+    """Ограничение частоты запросов корзиной токенов по пользователю и IP.
+
+    Бюджеты маршрутов задаются в RATE_LIMITS ({'tasks': '120/minute', ...});
+    при RATE_LIMIT_REDIS_URL корзины хранятся в Redis и общие для всех процессов.
+    """
+
+    def __init__(self):
+        self.store = MemoryBucketStore()
+
+    def init_app(self, app):
+        if app.config.get('RATE_LIMIT_REDIS_URL'):
+            self.store = RedisBucketStore(app.config['RATE_LIMIT_REDIS_URL'])
+
+    def _check(self, budget, per):
+        limits = current_app.config['RATE_LIMITS']
+        rate, burst = parse_budget(limits.get(budget, limits['default']))
+        now = time.time()
+
+        keys = []
+        if 'user' in per and current_user.is_authenticated:
+            keys.append(f'{budget}:user:{current_user.id}')
+        if 'ip' in per:
+            keys.append(f'{budget}:ip:{request.remote_addr}')
+
+        retry_after = 0
+        for key in keys:
+            allowed, wait = self.store.take(key, rate, burst, now)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+        return retry_after
+
+    def limit(self, budget='default', per=('user', 'ip')):
+        """Декоратор: при исчерпании бюджета отвечает 429 с заголовком Retry-After"""
+        def decorator(f):
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                if current_app.config.get('RATE_LIMIT_ENABLED'):
+                    retry_after = self._check(budget, per)
+                    if retry_after:
+                        response = jsonify({'error': 'Слишком много запросов, попробуйте позже'})
+                        response.status_code = 429
+                        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                        return response
+                return f(*args, **kwargs)
+            return decorated_function
+        return decorator
+
+
+rate_limiter = RateLimiter()
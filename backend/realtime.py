@@ -0,0 +1,58 @@
+from flask_socketio import SocketIO
+
+# Сервер Socket.IO; подключается к приложению через socketio.init_app(app)
+socketio = SocketIO()
+
+# Комната, в которую рассылаются изменения онлайн-статусов
+PRESENCE_ROOM = 'presence'
+
+# Комната для ролей, которые видят все задачи (admin, director)
+ALL_TASKS_ROOM = 'tasks:all'
+
+
+def user_room(user_id):
+    return f'user:{user_id}'
+
+
+def project_room(project_id):
+    return f'project:{project_id}'
+
+
+def chat_room(chat_id):
+    return f'chat:{chat_id}'
+
+
+def task_rooms(task):
+    """Комнаты, подписчики которых должны узнать об изменении задачи.
+
+    События несут задачу целиком (с доступами к серверу), поэтому уходят только
+    тем, кому ее показывает visible_tasks: администраторам и директорам
+    и автору задачи. В комнату проекта уходят только сводные поля
+    (broadcast_project_task_event).
+    """
+    return {ALL_TASKS_ROOM, user_room(task.created_by)}
+
+
+# Поля задачи в событиях комнаты проекта: в ней владелец проекта, которому
+# visible_tasks может не показывать саму задачу, поэтому только сводные поля
+PROJECT_TASK_FIELDS = ('id', 'projectId', 'status', 'priority', 'progress', 'updatedAt')
+
+
+def broadcast_project_task_event(action, task_data, project_ids):
+    """Рассылка изменения задачи (created, updated, deleted) в комнаты проектов"""
+    rooms = {project_room(project_id) for project_id in project_ids if project_id}
+    if rooms:
+        socketio.emit('project_task', {
+            'action': action,
+            'task': {key: task_data.get(key) for key in PROJECT_TASK_FIELDS}
+        }, to=sorted(rooms))
+
+
+def task_changes(before, after):
+    """Поля сериализованной задачи, значения которых изменились"""
+    return {key: value for key, value in after.items() if before.get(key) != value}
+
+
+def broadcast_task_event(event, payload, rooms):
+    """Рассылка события об изменении задачи в указанные комнаты"""
+    socketio.emit(event, payload, to=sorted(rooms))
@@ -0,0 +1,61 @@
+import time
+from functools import wraps
+from flask import g, has_request_context, request, session, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql import Select
+
+# Ключ bind'а реплики в SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+# Время последней записи пользователя в cookie-сессии
+WRITE_MARK_KEY = '_db_write_at'
+
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+
+class RoutingSession(Session):
+    """Сессия, отправляющая SELECT'ы read-only маршрутов на реплику.
+
+    Реплика используется, только если маршрут помечен декоратором read_only
+    и в конфигурации задан bind 'replica'. Запись, flush и SELECT ... FOR UPDATE
+    всегда идут на основную базу.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        return (has_request_context() and g.get('read_only', False) and not self._flushing
+                and isinstance(clause, Select) and clause._for_update_arg is None)
+
+
+def read_only(f):
+    """Декоратор: запросы маршрута читают с реплики.
+
+    Пользователь, который недавно что-то изменил, читает с основной базы
+    в течение REPLICA_READ_AFTER_WRITE секунд, чтобы увидеть свои изменения
+    несмотря на отставание реплики.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        written_at = session.get(WRITE_MARK_KEY, 0)
+        g.read_only = time.time() - written_at > current_app.config['REPLICA_READ_AFTER_WRITE']
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def init_replicas(app):
+    """Подключает реплику из SQLALCHEMY_REPLICA_URI; вызывается до db.init_app"""
+    if not app.config.get('SQLALCHEMY_REPLICA_URI'):
+        return
+    app.config.setdefault('SQLALCHEMY_BINDS', {})[REPLICA_BIND] = app.config['SQLALCHEMY_REPLICA_URI']
+
+    @app.after_request
+    def mark_write(response):
+        if request.method in WRITE_METHODS and response.status_code < 400:
+            session[WRITE_MARK_KEY] = time.time()
+        return response
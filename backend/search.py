@@ -0,0 +1,101 @@
+import re
+from sqlalchemy import DDL, event, func, literal_column, select, table, column, text
+from models import db, Task
+
+# Конфигурация полнотекстового поиска PostgreSQL (латиница обрабатывается английским стеммером)
+SEARCH_CONFIG = 'russian'
+
+# Веса полей: заголовок важнее описания, описание важнее ТЗ
+SEARCH_VECTOR = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(technical_spec, '')), 'C')"
+)
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+# PostgreSQL: вычисляемая колонка tsvector с GIN-индексом, обновляется самой базой
+POSTGRES_SEARCH_DDL = [
+    f"ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+]
+
+# SQLite: таблица FTS5 над tasks (external content), синхронизируется триггерами
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, technical_spec, content='tasks', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description, technical_spec) "
+    "VALUES (new.id, new.title, new.description, new.technical_spec); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, technical_spec) "
+    "VALUES ('delete', old.id, old.title, old.description, old.technical_spec); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description, technical_spec ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description, technical_spec) "
+    "VALUES ('delete', old.id, old.title, old.description, old.technical_spec); "
+    "INSERT INTO tasks_fts(rowid, title, description, technical_spec) "
+    "VALUES (new.id, new.title, new.description, new.technical_spec); END",
+]
+
+# Индекс создается вместе с таблицей tasks и в db.create_all()
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Task.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Task.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS tasks_fts').execute_if(dialect='sqlite'))
+
+tasks_fts = table('tasks_fts', column('rowid'))
+
+
+def _fts5_query(phrase):
+    """Запрос пользователя в синтаксис FTS5: все слова обязательны, последнее - по префиксу"""
+    words = re.findall(r'\w+', phrase)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+
+
+def match_tasks(query, phrase):
+    """Ограничивает выборку задач совпадениями с phrase и упорядочивает по релевантности.
+
+    Возвращает None, если в запросе нет ни одного слова.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, phrase)
+        vector = literal_column('tasks.search_vector')
+        return query.filter(vector.op('@@')(tsquery)).order_by(
+            func.ts_rank_cd(vector, tsquery).desc(), Task.id.desc()
+        )
+
+    fts_query = _fts5_query(phrase)
+    if fts_query is None:
+        return None
+    matches = select(
+        tasks_fts.c.rowid.label('task_id'),
+        func.bm25(literal_column('tasks_fts'), *BM25_WEIGHTS).label('rank')
+    ).where(literal_column('tasks_fts').op('MATCH')(fts_query)).subquery()
+    # bm25 тем меньше, чем лучше совпадение
+    return query.join(matches, matches.c.task_id == Task.id).order_by(matches.c.rank, Task.id.desc())
+
+
+def rebuild_search_index():
+    """Создает недостающие структуры поиска и заново индексирует существующие задачи"""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        # Вычисляемая колонка заполняется при добавлении, переиндексация не нужна
+        for statement in POSTGRES_SEARCH_DDL:
+            db.session.execute(text(statement))
+    elif dialect == 'sqlite':
+        for statement in SQLITE_SEARCH_DDL:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+    db.session.commit()
+
+
+def init_task_search(app):
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Создать индекс полнотекстового поиска задач и проиндексировать существующие задачи"""
+        rebuild_search_index()
+        print('Индекс поиска задач перестроен')
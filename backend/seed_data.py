@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Генератор синтетических данных для нагрузочного тестирования и замеров
+
+Создает пользователей, проекты, задачи с исполнителями и метаданными файлов,
+чаты с сообщениями в объемах, близких к рабочим. Данные воспроизводимы:
+при одинаковых параметрах и --seed получается тот же набор строк.
+Даты отсчитываются от --base-date, а не от текущего времени.
+Строки вставляются пачками: в PostgreSQL через COPY, в остальных базах
+через executemany. Файлы на диск не записываются.
+
+    python seed_data.py --tasks 1000000 --users 2000 --messages 500000
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, or_, select, text, update
+from app import app
+from models import (db, User, Project, Task, TaskFile, Chat, ChatMessage,
+                    task_assignees, chat_participants)
+from passwords import password_hasher
+from counters import rebuild_task_counters
+
+# Доли ролей среди пользователей (остальные - разработчики)
+ROLE_SHARES = [('admin', 0.01), ('director', 0.01), ('manager', 0.1)]
+
+TASK_STATUSES = (['active', 'completed', 'archived'], [60, 30, 10])
+TASK_PRIORITIES = (['low', 'medium', 'high'], [25, 50, 25])
+TASK_PROGRESS = (['not_started', 'in_progress', 'testing', 'completed'], [40, 35, 10, 15])
+FILE_TYPES = [
+    ('attachment', 'application/pdf', 'pdf'),
+    ('attachment', 'text/plain', 'txt'),
+    ('screenshot', 'image/png', 'png'),
+    ('screenshot', 'image/jpeg', 'jpg'),
+]
+# Точка отсчета дат по умолчанию: от текущего времени данные зависеть не должны
+BASE_TIME = datetime(2026, 1, 1)
+
+WORDS = ('настроить исправить обновить проверить добавить удалить перенести сервер API базу '
+         'интерфейс отчет авторизацию загрузку фильтр экспорт уведомления кэш миграцию').split()
+
+
+def next_id(model):
+    """Первый свободный id таблицы: строки вставляются с явными id, чтобы не читать их обратно"""
+    return (db.session.query(func.max(model.id)).scalar() or 0) + 1
+
+
+def _copy_value(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return value
+
+
+def _copy_rows(table, rows):
+    """Пачка строк через COPY ... FROM STDIN (PostgreSQL)"""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+
+
+def bulk_insert(table, rows, batch_size):
+    """Вставляет строки (итератор словарей) пачками; возвращает их число"""
+    use_copy = db.engine.dialect.name == 'postgresql'
+    total = 0
+    batch = []
+
+    def flush():
+        if use_copy:
+            _copy_rows(table, batch)
+        else:
+            db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            total += len(batch)
+            batch = []
+            print(f"  {table.name}: {total}", end='\r', flush=True)
+    if batch:
+        flush()
+        total += len(batch)
+    print(f"  {table.name}: {total}")
+    return total
+
+
+def reset_sequences(*models):
+    # После вставки с явными id последовательности PostgreSQL нужно сдвинуть вручную
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+        ))
+    db.session.commit()
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _random_time(rng, now, days):
+    return now - timedelta(seconds=rng.randrange(days * 24 * 60 * 60))
+
+
+def user_rows(rng, start_id, count, password_hash, now, days):
+    for user_id in range(start_id, start_id + count):
+        role = 'developer'
+        roll = rng.random()
+        for name, share in ROLE_SHARES:
+            if roll < share:
+                role = name
+                break
+            roll -= share
+        yield {
+            'id': user_id,
+            'username': f'user{user_id}',
+            'email': f'user{user_id}@example.com',
+            'password_hash': password_hash,
+            'role': role,
+            'full_name': f'Пользователь {user_id}',
+            'is_active': rng.random() > 0.02,
+            'created_at': _random_time(rng, now, days),
+        }
+
+
+def project_rows(rng, start_id, count, owner_ids, now, days):
+    for project_id in range(start_id, start_id + count):
+        created_at = _random_time(rng, now, days)
+        yield {
+            'id': project_id,
+            'name': f'Проект {project_id}',
+            'description': _sentence(rng, 8),
+            'status': rng.choices(*TASK_STATUSES)[0],
+            'owner_id': rng.choice(owner_ids),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def task_rows(rng, start_id, count, creator_ids, developer_ids, project_ids, now, days):
+    """Задачи; вместе с каждой выдается список id исполнителей"""
+    for task_id in range(start_id, start_id + count):
+        created_at = _random_time(rng, now, days)
+        start_date = created_at + timedelta(days=rng.randrange(0, 7)) if rng.random() < 0.7 else None
+        due_date = (start_date or created_at) + timedelta(days=rng.randrange(1, 60)) if rng.random() < 0.6 else None
+        assignees = rng.sample(developer_ids, min(len(developer_ids), rng.choice([1, 1, 1, 2, 3])))
+        yield {
+            'id': task_id,
+            'title': f'{_sentence(rng, 4)} #{task_id}',
+            'description': _sentence(rng, rng.randrange(5, 40)),
+            'status': rng.choices(*TASK_STATUSES)[0],
+            'priority': rng.choices(*TASK_PRIORITIES)[0],
+            'progress': rng.choices(*TASK_PROGRESS)[0],
+            'start_date': start_date,
+            'due_date': due_date,
+            'estimated_hours': rng.choice([None, 1, 2, 4, 8, 16, 40]),
+            'actual_hours': 0,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'assignee_id': assignees[0],
+            'created_by': rng.choice(creator_ids),
+            'project_id': rng.choice(project_ids) if project_ids and rng.random() < 0.9 else None,
+        }, assignees
+
+
+def file_rows(rng, start_id, tasks, files_per_task):
+    """Метаданные файлов: в среднем files_per_task на задачу"""
+    file_id = start_id
+    for task_id, created_at in tasks:
+        count = int(files_per_task) + (rng.random() < files_per_task % 1)
+        for _ in range(count):
+            file_type, mime_type, extension = rng.choice(FILE_TYPES)
+            checksum = hashlib.sha256(f'{file_id}'.encode()).hexdigest()
+            yield {
+                'id': file_id,
+                'task_id': task_id,
+                'filename': f'{checksum}.{extension}',
+                'original_filename': f'file_{file_id}.{extension}',
+                'file_path': f'uploads/blobs/{checksum[:2]}/{checksum[2:4]}/{checksum}',
+                'file_size': rng.randrange(1024, 20 * 1024 * 1024),
+                'mime_type': mime_type,
+                'file_type': file_type,
+                'checksum': checksum,
+                'uploaded_at': created_at + timedelta(minutes=rng.randrange(1, 60 * 24 * 7)),
+            }
+            file_id += 1
+
+
+def seed_tasks(rng, count, users, project_ids, files_per_task=0.3, days=730, batch_size=10000, now=BASE_TIME):
+    """Задачи с исполнителями и метаданными файлов; users - [(id, role)], даты - за days дней до now"""
+    creator_ids = [user_id for user_id, role in users if role in ('admin', 'manager', 'director')] or \
+        [user_id for user_id, _ in users]
+    developer_ids = [user_id for user_id, role in users if role == 'developer'] or \
+        [user_id for user_id, _ in users]
+
+    task_start, file_start = next_id(Task), next_id(TaskFile)
+    # Исполнители и файлы пишутся после задач, поэтому задачи генерируются пачками
+    for offset in range(0, count, batch_size):
+        chunk = list(task_rows(rng, task_start + offset, min(batch_size, count - offset),
+                               creator_ids, developer_ids, project_ids, now, days))
+        bulk_insert(Task.__table__, [row for row, _ in chunk], batch_size)
+        bulk_insert(task_assignees, [{'task_id': row['id'], 'user_id': user_id}
+                                     for row, assignees in chunk for user_id in assignees], batch_size)
+        file_start += bulk_insert(TaskFile.__table__, file_rows(
+            rng, file_start, [(row['id'], row['created_at']) for row, _ in chunk], files_per_task), batch_size)
+    reset_sequences(Task, TaskFile)
+
+
+def seed_chats(rng, chats, messages, user_ids, days=180, batch_size=10000, now=BASE_TIME):
+    """Личные чаты случайных пар пользователей и сообщения в них"""
+    chat_start = next_id(Chat)
+    chat_ids = list(range(chat_start, chat_start + chats))
+    bulk_insert(Chat.__table__, ({'id': chat_id, 'created_at': now - timedelta(days=days), 'updated_at': now}
+                                 for chat_id in chat_ids), batch_size)
+
+    members = {chat_id: rng.sample(user_ids, 2) for chat_id in chat_ids}
+    bulk_insert(chat_participants, ({'chat_id': chat_id, 'user_id': user_id}
+                                    for chat_id, pair in members.items() for user_id in pair), batch_size)
+
+    def message_rows():
+        message_id = next_id(ChatMessage)
+        # Сообщения идут по времени; активность распределена между чатами неравномерно
+        step = timedelta(days=days) / max(messages, 1)
+        weights = [rng.paretovariate(1.5) for _ in chat_ids]
+        for i, chat_id in enumerate(rng.choices(chat_ids, weights, k=messages)):
+            yield {
+                'id': message_id + i,
+                'chat_id': chat_id,
+                'sender_id': rng.choice(members[chat_id]),
+                'content': _sentence(rng, rng.randrange(1, 25)),
+                'message_type': 'text',
+                'created_at': now - timedelta(days=days) + step * i,
+                'is_read': i < messages * 0.95,
+            }
+
+    bulk_insert(ChatMessage.__table__, message_rows(), batch_size)
+    reset_sequences(Chat, ChatMessage)
+
+    # Указатели на последние сообщения и метки прочтения участников
+    seeded = Chat.id.between(chat_ids[0], chat_ids[-1])
+    db.session.execute(update(Chat).where(seeded).values(
+        last_message_id=select(func.max(ChatMessage.id)).where(ChatMessage.chat_id == Chat.id).scalar_subquery(),
+        updated_at=func.coalesce(select(func.max(ChatMessage.created_at)).where(
+            ChatMessage.chat_id == Chat.id).scalar_subquery(), Chat.updated_at)
+    ))
+    db.session.execute(update(chat_participants).where(
+        chat_participants.c.chat_id.between(chat_ids[0], chat_ids[-1])
+    ).values(last_read_message_id=select(func.max(ChatMessage.id)).where(
+        ChatMessage.chat_id == chat_participants.c.chat_id,
+        or_(ChatMessage.sender_id == chat_participants.c.user_id, ChatMessage.is_read)
+    ).scalar_subquery()))
+    db.session.commit()
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    now = args.base_date
+
+    if args.reset:
+        db.drop_all()
+        db.create_all()
+
+    password_hash = password_hasher.hash(args.password)
+    user_start = next_id(User)
+    bulk_insert(User.__table__, user_rows(rng, user_start, args.users, password_hash, now, args.days),
+                args.batch_size)
+    reset_sequences(User)
+    # Порядок строк задан явно: от него зависят выборки rng
+    users = [(row.id, row.role) for row in db.session.query(User.id, User.role).order_by(User.id)]
+
+    owner_ids = [user_id for user_id, role in users if role in ('admin', 'manager')] or [user_id for user_id, _ in users]
+    project_start = next_id(Project)
+    bulk_insert(Project.__table__, project_rows(rng, project_start, args.projects, owner_ids, now, args.days),
+                args.batch_size)
+    reset_sequences(Project)
+    project_ids = [row.id for row in db.session.query(Project.id).order_by(Project.id)]
+
+    seed_tasks(rng, args.tasks, users, project_ids, args.files_per_task, args.days, args.batch_size, now)
+    if args.chats and args.messages:
+        seed_chats(rng, args.chats, args.messages, [user_id for user_id, _ in users],
+                   batch_size=args.batch_size, now=now)
+
+    # COPY и executemany не проходят через обработчики flush, счетчики строятся заново
+    if app.config['TASK_COUNTERS_ENABLED']:
+        rebuild_task_counters()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Генерация синтетических данных Task Manager')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--projects', type=int, default=100)
+    parser.add_argument('--tasks', type=int, default=100000)
+    parser.add_argument('--files-per-task', type=float, default=0.3, help='среднее число файлов на задачу')
+    parser.add_argument('--chats', type=int, default=2000)
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=730, help='за сколько дней распределить даты задач')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--base-date', type=datetime.fromisoformat, default=BASE_TIME,
+                        help='дата, от которой отсчитываются даты данных (YYYY-MM-DD)')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--password', default='password123', help='пароль всех созданных пользователей')
+    parser.add_argument('--reset', action='store_true', help='пересоздать таблицы перед генерацией')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    started = time.time()
+    with app.app_context():
+        seed(args)
+    print(f"Готово за {time.time() - started:.1f} с")
@@ -0,0 +1,120 @@
+import base64
+from datetime import datetime
+from sqlalchemy import tuple_
+from sqlalchemy.orm import defer, joinedload, selectinload
+from models import Task, TASK_FIELDS
+
+# Поля, для которых нужна связанная сущность
+TASK_FIELD_RELATIONS = {
+    'assigneeName': 'assignee',
+    'creatorName': 'creator',
+    'projectName': 'project',
+    'assignees': 'assignees',
+    'files': 'files',
+    'screenshots': 'files',
+}
+
+# Тяжелые текстовые колонки, которые не читаются, если поле не запрошено
+TASK_HEAVY_COLUMNS = {
+    'description': 'description',
+    'serverPassword': 'server_password',
+    'sshKey': 'ssh_key',
+    'technicalSpec': 'technical_spec',
+}
+
+
+def parse_task_fields(value):
+    """Разбор параметра fields=; возвращает None, если нужны все поля.
+
+    Бросает ValueError при неизвестном имени поля.
+    """
+    if not value:
+        return None
+    fields = ['id']
+    for name in value.split(','):
+        name = name.strip()
+        if not name or name in fields:
+            continue
+        if name not in TASK_FIELDS:
+            raise ValueError(f'Неизвестное поле: {name}')
+        fields.append(name)
+    return fields
+
+
+def visible_tasks(query, user):
+    """Ограничивает выборку задачами, которые видит пользователь.
+
+    Администратор и директор видят все задачи, менеджер и разработчик - созданные ими.
+    """
+    if user.role in ('admin', 'director'):
+        return query
+    return query.filter(Task.created_by == user.id)
+
+
+def with_task_relations(query, fields=None):
+    """Заранее подгружает связи задач, которые нужны для сериализации.
+
+    Исполнитель, создатель и проект подтягиваются JOIN'ом в основном запросе,
+    а коллекции (assignees, files) - отдельным запросом IN (...) на всю выборку,
+    поэтому список задач любого размера загружается за фиксированное число запросов.
+    Если передан набор полей, грузятся только нужные связи и колонки.
+    """
+    if fields is None:
+        relations = set(TASK_FIELD_RELATIONS.values())
+    else:
+        relations = {TASK_FIELD_RELATIONS[name] for name in fields if name in TASK_FIELD_RELATIONS}
+        query = query.options(*[
+            defer(getattr(Task, column))
+            for name, column in TASK_HEAVY_COLUMNS.items() if name not in fields
+        ])
+
+    options = []
+    for relation in ('assignee', 'creator', 'project'):
+        if relation in relations:
+            options.append(joinedload(getattr(Task, relation)))
+    for relation in ('assignees', 'files'):
+        if relation in relations:
+            options.append(selectinload(getattr(Task, relation)))
+    return query.options(*options)
+
+
+def serialize_tasks(tasks, fields=None):
+    """Сериализация списка задач, загруженных через with_task_relations"""
+    return [task.to_dict(fields) for task in tasks]
+
+
+def encode_cursor(timestamp, row_id):
+    """Курсор keyset-пагинации на позицию (timestamp, id)"""
+    raw = f'{timestamp.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Разбор курсора в (timestamp, id); бросает ValueError, если курсор поврежден"""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError('Некорректный курсор') from e
+
+
+def encode_task_cursor(task):
+    """Курсор на позицию задачи в списке, упорядоченном по (created_at, id)"""
+    return encode_cursor(task.created_at, task.id)
+
+
+def paginate_tasks(query, cursor=None, limit=100):
+    """Keyset-пагинация задач от новых к старым.
+
+    Возвращает (задачи, курсор следующей страницы или None).
+    """
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        # Сравнение строк (created_at, id) - диапазон в индексе ix_tasks_*_created_at_id
+        query = query.filter(tuple_(Task.created_at, Task.id) < tuple_(created_at, task_id))
+
+    tasks = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1).all()
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        return tasks, encode_task_cursor(tasks[-1])
+    return tasks, None
@@ -0,0 +1,113 @@
+import hashlib
+import os
+import time
+import uuid
+from models import TaskFile
+
+# Размер блока при копировании потоков
+READ_BLOCK_SIZE = 64 * 1024
+
+# Уменьшенные копии изображений: имя варианта -> максимальная сторона в пикселях
+DERIVATIVE_SIZES = {
+    'thumb': 256,
+    'preview': 1024,
+}
+
+
+def derivative_path(file_path, size):
+    """Путь уменьшенной копии, лежащей рядом с оригиналом"""
+    return f'{file_path}.{size}.jpg'
+
+
+class BlobStore:
+    """Хранилище вложений с адресацией по содержимому.
+
+    Файл лежит по пути <root>/blobs/ab/cd/<sha256>, поэтому одинаковые файлы
+    хранятся один раз, а в каждом каталоге остается немного записей.
+    Ссылки на блоб - строки TaskFile с тем же checksum; файл удаляется с диска,
+    когда пропадает последняя ссылка.
+    """
+
+    def __init__(self, root='uploads', grace_period=3600):
+        self.root = root
+        self.grace_period = grace_period
+
+    def init_app(self, app):
+        self.root = app.config['UPLOAD_FOLDER']
+        self.grace_period = app.config.get('BLOB_GRACE_PERIOD', self.grace_period)
+
+    @property
+    def temp_dir(self):
+        return os.path.join(self.root, 'tmp')
+
+    def path_for(self, checksum):
+        return os.path.join(self.root, 'blobs', checksum[:2], checksum[2:4], checksum)
+
+    def put_file(self, temp_path, checksum):
+        """Переносит готовый файл в хранилище; возвращает путь блоба.
+
+        Существующий блоб переиспользуется, и у него обновляется mtime: release
+        не удаляет блобы, тронутые в пределах BLOB_GRACE_PERIOD, пока строка
+        TaskFile новой ссылки еще не закоммичена.
+        """
+        path = self.path_for(checksum)
+        try:
+            os.utime(path)
+            os.remove(temp_path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        return path
+
+    def put_stream(self, stream):
+        """Сохраняет поток, считая хэш и размер на лету; возвращает (путь, checksum, размер)"""
+        os.makedirs(self.temp_dir, exist_ok=True)
+        temp_path = os.path.join(self.temp_dir, str(uuid.uuid4()))
+        sha256 = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, 'wb') as f:
+                for block in iter(lambda: stream.read(READ_BLOCK_SIZE), b''):
+                    f.write(block)
+                    sha256.update(block)
+                    size += len(block)
+        except Exception:
+            os.remove(temp_path)
+            raise
+        checksum = sha256.hexdigest()
+        return self.put_file(temp_path, checksum), checksum, size
+
+    def is_referenced(self, checksum):
+        return TaskFile.query.filter_by(checksum=checksum).first() is not None
+
+    def release(self, file_path, checksum):
+        """Удаляет файл с диска, если на него больше не ссылается ни один TaskFile.
+
+        Вызывается после коммита удаления строк TaskFile. Файлы, загруженные
+        до появления хранилища (без checksum), удаляются сразу. Возвращает False,
+        если блоб недавно переиспользован загрузкой и проверку нужно повторить позже.
+
+        Блоб сначала атомарно переименовывается: put_file, пришедший после этого,
+        создаст его заново, а пришедший раньше обновил mtime, и блоб возвращается на место.
+        """
+        if checksum and self.is_referenced(checksum):
+            return True
+        if checksum and os.path.exists(file_path):
+            doomed = f'{file_path}.{uuid.uuid4().hex}.deleting'
+            try:
+                os.replace(file_path, doomed)
+            except FileNotFoundError:
+                return True
+            fresh = time.time() - os.stat(doomed).st_mtime < self.grace_period
+            if fresh or self.is_referenced(checksum):
+                os.replace(doomed, file_path)
+                # Ссылка загрузки, переиспользовавшей блоб, может еще не быть закоммичена
+                return not fresh
+            os.remove(doomed)
+        for path in [file_path] + [derivative_path(file_path, size) for size in DERIVATIVE_SIZES]:
+            if os.path.exists(path):
+                os.remove(path)
+        return True
+
+
+blob_store = BlobStore()
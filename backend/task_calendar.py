@@ -0,0 +1,85 @@
+from datetime import datetime, time, timedelta
+from sqlalchemy import DDL, event, func, literal_column
+from models import db, Task
+
+# Поля задачи для календаря по умолчанию
+CALENDAR_FIELDS = ['id', 'title', 'status', 'priority', 'progress', 'startDate', 'dueDate', 'createdAt',
+                   'assigneeId', 'assigneeName']
+
+
+def _span_sql(dialect, table=''):
+    """Границы интервала задачи в календаре: от даты начала (или создания) до срока.
+
+    Без срока задача занимает один день; перепутанные даты упорядочиваются.
+    """
+    start = f"coalesce({table}start_date, {table}created_at)"
+    end = f"coalesce({table}due_date, {start})"
+    if dialect == 'postgresql':
+        return f"least({start}, {end})", f"greatest({start}, {end})"
+    return f"min({start}, {end})", f"max({start}, {end})"
+
+
+# PostgreSQL: GiST-индекс по интервалу задачи, пересечение с окном ищется оператором &&
+POSTGRES_CALENDAR_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_tasks_calendar_span ON tasks USING gist "
+    "(tsrange({}, {}, '[]'))".format(*_span_sql('postgresql'))
+)
+
+# SQLite: индекс по концу интервала - окно около текущей даты отсекает всю историю задач
+SQLITE_CALENDAR_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_tasks_calendar_end ON tasks ({})".format(_span_sql('sqlite')[1])
+)
+
+event.listen(Task.__table__, 'after_create', DDL(POSTGRES_CALENDAR_INDEX).execute_if(dialect='postgresql'))
+event.listen(Task.__table__, 'after_create', DDL(SQLITE_CALENDAR_INDEX).execute_if(dialect='sqlite'))
+
+
+def parse_range(date_from, date_to, max_days):
+    """Окно календаря из параметров from/to (YYYY-MM-DD, обе даты включительно).
+
+    Возвращает (первый день, последний день); ValueError - если даты некорректны.
+    """
+    if not date_from or not date_to:
+        raise ValueError('Нужны параметры from и to')
+    try:
+        first_day = datetime.fromisoformat(date_from).date()
+        last_day = datetime.fromisoformat(date_to).date()
+    except ValueError:
+        raise ValueError('Даты должны быть в формате YYYY-MM-DD')
+    if last_day < first_day:
+        raise ValueError('Дата to раньше даты from')
+    if (last_day - first_day).days + 1 > max_days:
+        raise ValueError(f'Окно не может быть длиннее {max_days} дней')
+    return first_day, last_day
+
+
+def tasks_in_range(query, first_day, last_day):
+    """Ограничивает выборку задачами, интервал которых пересекается с окном"""
+    window_start = datetime.combine(first_day, time.min)
+    window_end = datetime.combine(last_day + timedelta(days=1), time.min)
+    dialect = db.engine.dialect.name
+    # Выражения совпадают с индексом, колонки квалифицированы из-за JOIN'ов связей
+    lower, upper = _span_sql(dialect, table='tasks.')
+    if dialect == 'postgresql':
+        span = literal_column(f"tsrange({lower}, {upper}, '[]')")
+        window = func.tsrange(window_start, window_end, literal_column("'[)'"))
+        return query.filter(span.op('&&')(window))
+    return query.filter(
+        literal_column(upper, db.DateTime) >= window_start,
+        literal_column(lower, db.DateTime) < window_end
+    )
+
+
+def day_buckets(tasks, first_day, last_day):
+    """Раскладывает задачи по дням окна: {'YYYY-MM-DD': [id задач]}"""
+    days = {}
+    for task in tasks:
+        start = task.start_date or task.created_at
+        if start is None:
+            continue
+        lower, upper = sorted((start.date(), (task.due_date or start).date()))
+        day = max(lower, first_day)
+        while day <= min(upper, last_day):
+            days.setdefault(day.isoformat(), []).append(task.id)
+            day += timedelta(days=1)
+    return days
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Скрипт для проверки, что материализованные счетчики задач совпадают
+с пересчетом по таблице задач после удаления проектов и пользователей
+"""
+
+import os
+
+# Отдельная база в памяти, чтобы не трогать рабочую
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+from app import app
+from models import db, User, Task, Project
+from counters import _collect_deltas, _apply_deltas, compute_task_stats, read_task_stats
+
+
+def assert_counters_match(step):
+    materialized, computed = read_task_stats(), compute_task_stats()
+    assert materialized == computed, f'{step}: счетчики {materialized} != пересчет {computed}'
+    print(f"[OK] {step}")
+
+
+def test_counters_after_cascading_deletes():
+    """Удаление проекта вместе с задачами и исполнителя не оставляет лишних строк счетчиков"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        event.listen(db.session, 'before_flush', _collect_deltas)
+        event.listen(db.session, 'after_flush', _apply_deltas)
+        try:
+            owner = User(username='owner', email='owner@example.com', password_hash='-',
+                         full_name='Владелец', role='manager')
+            developer = User(username='dev', email='dev@example.com', password_hash='-',
+                             full_name='Разработчик', role='developer')
+            db.session.add_all([owner, developer])
+            db.session.flush()
+            projects = [Project(name=f'Проект {i}', owner_id=owner.id) for i in range(2)]
+            db.session.add_all(projects)
+            db.session.flush()
+            for i in range(6):
+                db.session.add(Task(title=f'Задача {i}', created_by=owner.id, assignee_id=developer.id,
+                                    project_id=projects[i % 2].id,
+                                    status='active' if i % 3 else 'completed'))
+            db.session.commit()
+            assert_counters_match('создание задач')
+
+            # Как в delete_project: задачи и проект удаляются одним коммитом
+            project = projects[0]
+            for task in Task.query.filter_by(project_id=project.id).all():
+                db.session.delete(task)
+            db.session.delete(project)
+            db.session.commit()
+            assert_counters_match('удаление проекта с задачами')
+
+            # Как в delete_user: задачи исполнителя остаются без исполнителя
+            db.session.delete(developer)
+            db.session.commit()
+            assert_counters_match('удаление исполнителя')
+        finally:
+            event.remove(db.session, 'before_flush', _collect_deltas)
+            event.remove(db.session, 'after_flush', _apply_deltas)
+
+
+if __name__ == '__main__':
+    test_counters_after_cascading_deletes()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Скрипт для проверки числа SQL-запросов при загрузке списка задач
+"""
+
+import os
+
+# Отдельная база в памяти, чтобы не трогать рабочую
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import event
+from app import app
+from models import db, User, Task, TaskFile, Project
+from serializers import with_task_relations, serialize_tasks
+
+
+def seed_tasks(count, owner_id, developer_id, project_id):
+    """Создает задачи с исполнителями и файлами"""
+    # Пользователи перечитываются: count_list_queries отсоединяет все объекты сессии
+    assignees = User.query.filter(User.id.in_([owner_id, developer_id])).all()
+    for i in range(count):
+        task = Task(
+            title=f'Задача {i}',
+            status='active',
+            created_by=owner_id,
+            assignee_id=developer_id,
+            project_id=project_id
+        )
+        task.assignees = assignees
+        db.session.add(task)
+        db.session.flush()
+        db.session.add(TaskFile(
+            task_id=task.id,
+            filename=f'file_{i}.txt',
+            original_filename=f'file_{i}.txt',
+            file_path=f'uploads/file_{i}.txt'
+        ))
+    db.session.commit()
+
+
+def count_list_queries():
+    """Возвращает число запросов, потраченных на загрузку и сериализацию списка"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    db.session.expunge_all()
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        tasks = with_task_relations(Task.query.filter_by(status='active')).all()
+        serialize_tasks(tasks)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_task_list_query_count():
+    """Число запросов не должно зависеть от количества задач"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        owner = User(username='owner', email='owner@example.com', password_hash='-',
+                     full_name='Владелец', role='manager')
+        developer = User(username='dev', email='dev@example.com', password_hash='-',
+                         full_name='Разработчик', role='developer')
+        db.session.add_all([owner, developer])
+        db.session.flush()
+        project = Project(name='Проект', owner_id=owner.id)
+        db.session.add(project)
+        db.session.commit()
+        owner_id, developer_id, project_id = owner.id, developer.id, project.id
+
+        seed_tasks(5, owner_id, developer_id, project_id)
+        small = count_list_queries()
+
+        seed_tasks(50, owner_id, developer_id, project_id)
+        large = count_list_queries()
+
+        print(f"Запросов на 5 задач: {small}, на 55 задач: {large}")
+        assert small == large, 'Число запросов растет вместе с количеством задач'
+        print("[OK] Число запросов постоянно")
+
+
+if __name__ == '__main__':
+    test_task_list_query_count()
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from storage import DERIVATIVE_SIZES, derivative_path
+
+# Типы файлов, для которых строятся уменьшенные копии
+THUMBNAIL_FILE_TYPES = ('screenshot',)
+
+
+class ThumbnailGenerator:
+    """Фоновое построение уменьшенных копий скриншотов.
+
+    Копии строятся в пуле потоков после загрузки и сохраняются рядом с
+    оригиналом (см. storage.derivative_path), так что запрос загрузки
+    не ждет обработки изображения.
+    """
+
+    def __init__(self):
+        self.max_workers = 2
+        self._executor = None
+
+    def init_app(self, app):
+        self.max_workers = app.config.get('THUMBNAIL_WORKERS', self.max_workers)
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='thumbnails')
+        return self._executor
+
+    def wants(self, task_file):
+        return task_file.file_type in THUMBNAIL_FILE_TYPES or \
+            (task_file.mime_type or '').startswith('image/')
+
+    def schedule(self, task_file):
+        """Ставит построение копий в очередь пула, если файл - изображение"""
+        if self.wants(task_file):
+            self.executor.submit(self._run, task_file.file_path)
+
+    def _run(self, file_path):
+        try:
+            generate_derivatives(file_path)
+        except Exception as e:
+            print(f"Ошибка построения миниатюр {file_path}: {e}")
+
+
+def generate_derivatives(file_path):
+    """Строит недостающие уменьшенные копии изображения"""
+    with Image.open(file_path) as image:
+        image.load()
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for size, max_side in DERIVATIVE_SIZES.items():
+            path = derivative_path(file_path, size)
+            if os.path.exists(path):
+                continue
+            copy = image.copy()
+            copy.thumbnail((max_side, max_side))
+            temp_path = f'{path}.tmp'
+            copy.save(temp_path, 'JPEG', quality=85, optimize=True)
+            os.replace(temp_path, path)
+
+
+thumbnails = ThumbnailGenerator()
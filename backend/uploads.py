@@ -0,0 +1,295 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from werkzeug.utils import secure_filename
+from datetime import datetime, timedelta
+import hashlib
+import os
+import threading
+import time
+import uuid
+from models import db, Task, TaskFile, UploadSession
+from realtime import socketio, task_rooms, broadcast_task_event
+from cleanup import file_reaper
+from storage import blob_store
+from thumbnails import thumbnails
+
+uploads_bp = Blueprint('uploads', __name__)
+
+# Размер блока при чтении тела запроса и файлов
+READ_BLOCK_SIZE = 64 * 1024
+
+# Хэши загрузок, считаемые по мере поступления частей: upload_id -> (offset, sha256, время).
+# Если часть пришла в другой процесс, хэш досчитывается по файлу при завершении.
+_hashers = {}
+_hashers_lock = threading.Lock()
+
+
+def _get_session(upload_id):
+    """Сессия загрузки текущего пользователя или None"""
+    return UploadSession.query.filter_by(id=upload_id, user_id=current_user.id).first()
+
+
+def _file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(READ_BLOCK_SIZE), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+@uploads_bp.route('/api/tasks/<int:task_id>/uploads', methods=['POST'])
+@login_required
+def create_upload(task_id):
+    """Начало загрузки файла по частям"""
+    try:
+        Task.query.get_or_404(task_id)
+        data = request.get_json() or {}
+
+        filename = secure_filename(data.get('filename') or '')
+        if not filename:
+            return jsonify({'error': 'No file selected'}), 400
+
+        upload_id = str(uuid.uuid4())
+        os.makedirs(blob_store.temp_dir, exist_ok=True)
+        temp_path = os.path.join(blob_store.temp_dir, f'{upload_id}.part')
+        open(temp_path, 'wb').close()
+
+        upload = UploadSession(
+            id=upload_id,
+            task_id=task_id,
+            user_id=current_user.id,
+            original_filename=filename,
+            mime_type=data.get('mimeType'),
+            file_type=data.get('type', 'attachment'),
+            description=data.get('description', ''),
+            total_size=data.get('size'),
+            temp_path=temp_path
+        )
+        db.session.add(upload)
+        db.session.commit()
+
+        with _hashers_lock:
+            _hashers[upload_id] = (0, hashlib.sha256(), time.monotonic())
+
+        result = upload.to_dict()
+        result['chunkSize'] = current_app.config['UPLOAD_CHUNK_SIZE']
+        return jsonify(result), 201
+    except Exception as e:
+        db.session.rollback()
+        print(f"Ошибка создания загрузки: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/api/uploads/<upload_id>', methods=['GET'])
+@login_required
+def get_upload(upload_id):
+    """Состояние загрузки; offset - с какого байта продолжать"""
+    upload = _get_session(upload_id)
+    if not upload:
+        return jsonify({'error': 'Upload not found'}), 404
+    return jsonify(upload.to_dict())
+
+
+@uploads_bp.route('/api/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Прием очередной части файла.
+
+    Тело запроса - сырые байты части, параметр offset - позиция части в файле.
+    Тело пишется на диск блоками, не накапливаясь в памяти.
+    """
+    try:
+        upload = _get_session(upload_id)
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+
+        offset = request.args.get('offset', type=int)
+        if offset != upload.offset:
+            return jsonify({'error': 'Неверное смещение части', 'offset': upload.offset}), 409
+
+        with _hashers_lock:
+            hasher_offset, sha256, _ = _hashers.pop(upload_id, (None, None, None))
+        if hasher_offset != offset:
+            sha256 = None
+
+        written = 0
+        with open(upload.temp_path, 'r+b') as f:
+            f.seek(offset)
+            f.truncate()
+            for block in iter(lambda: request.stream.read(READ_BLOCK_SIZE), b''):
+                f.write(block)
+                if sha256:
+                    sha256.update(block)
+                written += len(block)
+
+        if upload.total_size is not None and offset + written > upload.total_size:
+            return jsonify({'error': 'Размер файла превышает заявленный', 'offset': upload.offset}), 400
+
+        upload.offset = offset + written
+        db.session.commit()
+
+        if sha256:
+            with _hashers_lock:
+                _hashers[upload_id] = (upload.offset, sha256, time.monotonic())
+
+        return jsonify(upload.to_dict())
+    except Exception as e:
+        db.session.rollback()
+        print(f"Ошибка загрузки части файла: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+@login_required
+def complete_upload(upload_id):
+    """Завершение загрузки: проверка размера и контрольной суммы, создание файла задачи"""
+    try:
+        upload = _get_session(upload_id)
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+
+        if upload.total_size is not None and upload.offset != upload.total_size:
+            return jsonify({'error': 'Файл загружен не полностью', 'offset': upload.offset}), 409
+
+        with _hashers_lock:
+            hasher_offset, sha256, _ = _hashers.pop(upload_id, (None, None, None))
+        checksum = sha256.hexdigest() if hasher_offset == upload.offset else _file_sha256(upload.temp_path)
+
+        data = request.get_json(silent=True) or {}
+        if data.get('checksum') and data['checksum'].lower() != checksum:
+            return jsonify({'error': 'Контрольная сумма не совпадает', 'checksum': checksum}), 400
+
+        file_path = blob_store.put_file(upload.temp_path, checksum)
+
+        task_file = TaskFile(
+            task_id=upload.task_id,
+            filename=checksum,
+            original_filename=upload.original_filename,
+            file_path=file_path,
+            file_size=upload.offset,
+            mime_type=upload.mime_type,
+            file_type=upload.file_type,
+            description=upload.description,
+            checksum=checksum
+        )
+        db.session.add(task_file)
+        db.session.delete(upload)
+        db.session.commit()
+
+        thumbnails.schedule(task_file)
+
+        file_data = task_file.to_dict()
+        broadcast_task_event('task_file_added', {'taskId': task_file.task_id, 'file': file_data},
+                             task_rooms(task_file.task))
+
+        return jsonify(file_data), 201
+    except Exception as e:
+        db.session.rollback()
+        print(f"Ошибка завершения загрузки: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+@uploads_bp.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def abort_upload(upload_id):
+    """Отмена загрузки"""
+    try:
+        upload = _get_session(upload_id)
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+
+        if os.path.exists(upload.temp_path):
+            os.remove(upload.temp_path)
+        with _hashers_lock:
+            _hashers.pop(upload_id, None)
+
+        db.session.delete(upload)
+        db.session.commit()
+
+        return jsonify({'message': 'Upload cancelled'})
+    except Exception as e:
+        db.session.rollback()
+        print(f"Ошибка отмены загрузки: {e}")
+        return jsonify({'error': str(e)}), 500
+
+
+class UploadExpirer:
+    """Удаление брошенных загрузок по частям.
+
+    Сессия, не получавшая частей дольше UPLOAD_SESSION_TTL секунд, удаляется,
+    а ее временный файл уходит в очередь удаления файлов. Хэши брошенных
+    загрузок вычищаются из памяти каждого процесса.
+    """
+
+    def __init__(self):
+        self.ttl = 24 * 3600
+        self.interval = 600
+        self.batch_size = 200
+        self._app = None
+        self._started = False
+
+    def init_app(self, app):
+        self._app = app
+        self.ttl = app.config.get('UPLOAD_SESSION_TTL', self.ttl)
+        self.interval = app.config.get('UPLOAD_EXPIRY_INTERVAL', self.interval)
+
+        @app.cli.command('expire-uploads')
+        def expire_uploads_command():
+            """Удалить брошенные загрузки по частям"""
+            total = 0
+            while True:
+                expired = self.expire()
+                total += expired
+                if expired < self.batch_size:
+                    break
+            print(f'Удалено загрузок: {total}')
+
+    def _prune_hashers(self):
+        cutoff = time.monotonic() - self.ttl
+        with _hashers_lock:
+            for upload_id in [key for key, (_, _, touched) in _hashers.items() if touched < cutoff]:
+                del _hashers[upload_id]
+
+    def expire(self):
+        """Удаляет одну пачку просроченных сессий; возвращает их число"""
+        self._prune_hashers()
+        cutoff = datetime.utcnow() - timedelta(seconds=self.ttl)
+        expired = UploadSession.query.filter(
+            UploadSession.updated_at < cutoff
+        ).limit(self.batch_size).with_for_update(skip_locked=True).all()
+        if not expired:
+            db.session.rollback()
+            return 0
+
+        # Временные файлы удаляются сборщиком после коммита, как и файлы задач
+        file_reaper.enqueue((upload.temp_path, None) for upload in expired)
+        upload_ids = [upload.id for upload in expired]
+        for upload in expired:
+            db.session.delete(upload)
+        db.session.commit()
+        file_reaper.wake()
+
+        with _hashers_lock:
+            for upload_id in upload_ids:
+                _hashers.pop(upload_id, None)
+        return len(upload_ids)
+
+    def _run(self):
+        while True:
+            socketio.sleep(self.interval)
+            with self._app.app_context():
+                try:
+                    while self.expire() == self.batch_size:
+                        pass
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"Ошибка удаления брошенных загрузок: {e}")
+
+    def start(self):
+        """Запускает фоновое удаление брошенных загрузок"""
+        if not self._started:
+            self._started = True
+            socketio.start_background_task(self._run)
+
+
+upload_expirer = UploadExpirer()
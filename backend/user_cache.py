@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from models import db, User, RoleMixin
+
+
+class UserPrincipal(RoleMixin, UserMixin):
+    """Легковесный пользователь для current_user: только id, роль и активность.
+
+    Обработчикам, которым нужна модель целиком (профиль, пароль),
+    следует загрузить ее явно: User.query.get(current_user.id).
+    """
+
+    def __init__(self, user_id, role, is_active):
+        self.id = user_id
+        self.role = role
+        self.active = is_active
+
+    @property
+    def is_active(self):
+        return self.active
+
+    def __repr__(self):
+        return f'<UserPrincipal {self.id} {self.role}>'
+
+
+class UserCache:
+    """LRU-кэш пользователей с ограниченным временем жизни записей (на процесс).
+
+    Кэш сбрасывается явно при изменении пользователя в этом процессе;
+    в других процессах запись устаревает не позже чем через USER_CACHE_TTL секунд.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # user_id -> (principal, expires_at)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+        self.max_size = app.config.get('USER_CACHE_SIZE', self.max_size)
+
+    def get(self, user_id):
+        """Пользователь по id: из кэша или одним запросом к базе"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        row = db.session.query(User.id, User.role, User.is_active).filter(User.id == user_id).first()
+        if not row:
+            self.invalidate(user_id)
+            return None
+
+        principal = UserPrincipal(row.id, row.role, row.is_active)
+        with self._lock:
+            self._entries[user_id] = (principal, now + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return principal
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
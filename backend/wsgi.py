@@ -0,0 +1,7 @@
+"""Точка входа для production-сервера:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import app, start_background_tasks
+
+start_background_tasks()
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import styled from 'styled-components';
+import { io } from 'socket.io-client';
 import Sidebar from './components/Sidebar';
 import Dashboard from './components/Dashboard';
 import Projects from './components/Projects';
@@ -41,6 +42,22 @@ const LoadingContainer = styled.div`
   background-color: #f5f5f5;
 `;
 
+// Преобразование дат задачи из ответа API
+const withTaskDates = (task) => ({
+  ...task,
+  ...(task.startDate !== undefined && { startDate: task.startDate ? new Date(task.startDate) : null }),
+  ...(task.dueDate !== undefined && { dueDate: task.dueDate ? new Date(task.dueDate) : null }),
+  ...(task.createdAt !== undefined && { createdAt: new Date(task.createdAt) }),
+  ...(task.updatedAt !== undefined && { updatedAt: new Date(task.updatedAt) })
+});
+
+// Добавляет задачу в список или заменяет существующую с тем же id
+const upsertTask = (tasks, task) => (
+  tasks.some(item => item.id === task.id)
+    ? tasks.map(item => (item.id === task.id ? task : item))
+    : [...tasks, task]
+);
+
 const LoadingText = styled.div`
   font-size: 18px;
   color: #666;
@@ -55,6 +72,10 @@ function App() {
   const [showTaskForm, setShowTaskForm] = useState(false);
   const [selectedDate, setSelectedDate] = useState(null);
   const [tasks, setTasks] = useState([]);
+  const [tasksCursor, setTasksCursor] = useState(null);
+  const [loadingMoreTasks, setLoadingMoreTasks] = useState(false);
+  // Последнее изменение задачи ({ id, fields }): по нему календарь решает, перезагружать ли окно
+  const [taskChange, setTaskChange] = useState(null);
   const [projects, setProjects] = useState([]);
   const [selectedProjectId, setSelectedProjectId] = useState(null);
   const [showAddProjectModal, setShowAddProjectModal] = useState(false);
@@ -71,6 +92,55 @@ function App() {
     checkAuth();
   }, []);
 
+  // Изменения задач приходят через Socket.IO, список правится на месте без перезагрузки
+  useEffect(() => {
+    if (!user) {
+      return undefined;
+    }
+
+    // Только WebSocket: backend работает в нескольких процессах без sticky-сессий
+    const socket = io({ withCredentials: true, transports: ['websocket'] });
+    const patchTask = (taskId, patch) => {
+      setTasks(prev => prev.map(task => (task.id === taskId ? patch(task) : task)));
+      setSelectedTask(prev => (prev && prev.id === taskId ? patch(prev) : prev));
+    };
+
+    socket.on('task_created', ({ task }) => {
+      setTaskChange({ id: task.id, fields: task });
+      if (task.status === 'active') {
+        setTasks(prev => upsertTask(prev, withTaskDates(task)));
+      }
+    });
+    socket.on('task_updated', ({ id, changes }) => {
+      setTaskChange({ id, fields: changes });
+      if (changes.status && changes.status !== 'active') {
+        setTasks(prev => prev.filter(task => task.id !== id));
+        return;
+      }
+      patchTask(id, task => ({ ...task, ...withTaskDates(changes) }));
+    });
+    socket.on('task_deleted', ({ id }) => {
+      setTaskChange({ id, fields: {} });
+      setTasks(prev => prev.filter(task => task.id !== id));
+    });
+    socket.on('task_file_added', ({ taskId, file }) => {
+      const key = file.fileType === 'screenshot' ? 'screenshots' : 'files';
+      patchTask(taskId, task => ({
+        ...task,
+        [key]: [...(task[key] || []).filter(item => item.id !== file.id), file]
+      }));
+    });
+    socket.on('task_file_deleted', ({ taskId, fileId }) => {
+      patchTask(taskId, task => ({
+        ...task,
+        files: (task.files || []).filter(item => item.id !== fileId),
+        screenshots: (task.screenshots || []).filter(item => item.id !== fileId)
+      }));
+    });
+
+    return () => socket.disconnect();
+  }, [user]);
+
   const checkAuth = async () => {
     try {
       const response = await fetch('/api/auth/me', {
@@ -93,29 +163,57 @@ function App() {
     }
   };
 
+  // Страница списка задач; курсор следующей страницы - в заголовке X-Next-Cursor
+  const fetchTasksPage = async (cursor) => {
+    const params = new URLSearchParams();
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await fetch(`/api/tasks?${params}`, {
+      credentials: 'include'
+    });
+
+    if (!response.ok) {
+      console.error('Ошибка загрузки задач');
+      return null;
+    }
+    const tasksData = await response.json();
+    return { tasks: tasksData.map(withTaskDates), cursor: response.headers.get('X-Next-Cursor') };
+  };
+
+  // Грузится только первая страница, остальные - по мере прокрутки списка (loadMoreTasks).
+  // Календарь и сводка дашборда берут данные из своих эндпоинтов
   const loadTasks = async () => {
     try {
-      const response = await fetch('/api/tasks', {
-        credentials: 'include'
-      });
-      
-      if (response.ok) {
-        const tasksData = await response.json();
-        setTasks(tasksData.map(task => ({
-          ...task,
-          startDate: task.startDate ? new Date(task.startDate) : null,
-          dueDate: task.dueDate ? new Date(task.dueDate) : null,
-          createdAt: new Date(task.createdAt),
-          updatedAt: new Date(task.updatedAt)
-        })));
-      } else {
-        console.error('Ошибка загрузки задач');
+      const page = await fetchTasksPage(null);
+      if (page) {
+        setTasks(page.tasks);
+        setTasksCursor(page.cursor);
       }
     } catch (error) {
       console.error('Ошибка загрузки задач:', error);
     }
   };
 
+  const loadMoreTasks = async () => {
+    if (!tasksCursor || loadingMoreTasks) {
+      return;
+    }
+    setLoadingMoreTasks(true);
+    try {
+      const page = await fetchTasksPage(tasksCursor);
+      if (page) {
+        // Задача могла прийти через Socket.IO раньше своей страницы
+        setTasks(prev => page.tasks.reduce(upsertTask, prev));
+        setTasksCursor(page.cursor);
+      }
+    } catch (error) {
+      console.error('Ошибка загрузки задач:', error);
+    } finally {
+      setLoadingMoreTasks(false);
+    }
+  };
+
   const loadProjects = async () => {
     try {
       const response = await fetch('/api/projects', {
@@ -146,6 +244,7 @@ function App() {
   const handleLogout = () => {
     setUser(null);
     setTasks([]);
+    setTasksCursor(null);
     setProjects([]);
   };
 
@@ -559,9 +658,24 @@ function App() {
     }
   };
 
-  const handleTaskSelect = (task) => {
+  const handleTaskSelect = async (task) => {
     setSelectedTask(task);
     setShowTaskModal(true);
+    if (tasks.some(item => item.id === task.id)) {
+      return;
+    }
+    // Задача из календаря или сводки, страница которой еще не загружена
+    try {
+      const response = await fetch(`/api/tasks/${task.id}`, {
+        credentials: 'include'
+      });
+      if (response.ok) {
+        const fullTask = withTaskDates(await response.json());
+        setSelectedTask(prev => (prev && prev.id === fullTask.id ? fullTask : prev));
+      }
+    } catch (error) {
+      console.error('Ошибка загрузки задачи:', error);
+    }
   };
 
   const handleTaskUpdate = async (updatedTask) => {
@@ -587,6 +701,7 @@ function App() {
         setTasks(tasks.map(task => 
           task.id === updatedTask.id ? taskWithDates : task
         ));
+        setTaskChange({ id: taskWithDates.id, fields: taskWithDates });
         if (selectedTask && selectedTask.id === updatedTask.id) {
           setSelectedTask(taskWithDates);
         }
@@ -616,7 +731,8 @@ function App() {
           createdAt: new Date(taskData.createdAt),
           updatedAt: new Date(taskData.updatedAt)
         };
-        setTasks([...tasks, taskWithDates]);
+        setTasks(prev => upsertTask(prev, taskWithDates));
+        setTaskChange({ id: taskWithDates.id, fields: taskWithDates });
         setShowTaskForm(false);
       }
     } catch (error) {
@@ -633,6 +749,7 @@ function App() {
 
       if (response.ok) {
         setTasks(tasks.filter(task => task.id !== taskId));
+        setTaskChange({ id: taskId, fields: {} });
         if (selectedTask && selectedTask.id === taskId) {
           setSelectedTask(null);
           setShowTaskModal(false);
@@ -659,6 +776,7 @@ function App() {
         return (
           <Dashboard
             tasks={tasks}
+            taskChange={taskChange}
             onTaskSelect={handleTaskSelect}
             selectedTask={selectedTask}
             onCreateTask={handleCreateTask}
@@ -670,6 +788,10 @@ function App() {
         return (
           <Projects
             tasks={tasks}
+            taskChange={taskChange}
+            hasMoreTasks={Boolean(tasksCursor)}
+            loadingMoreTasks={loadingMoreTasks}
+            onLoadMoreTasks={loadMoreTasks}
             onTaskSelect={handleTaskSelect}
             selectedTask={selectedTask}
             onCreateTask={handleCreateTask}
@@ -701,6 +823,7 @@ function App() {
         return (
           <Dashboard
             tasks={tasks}
+            taskChange={taskChange}
             onTaskSelect={handleTaskSelect}
             selectedTask={selectedTask}
             onCreateTask={handleCreateTask}
@@ -4,6 +4,7 @@ import moment from 'moment';
 import 'react-big-calendar/lib/css/react-big-calendar.css';
 import styled from 'styled-components';
 import { FiCalendar, FiChevronLeft, FiChevronRight, FiPlus } from 'react-icons/fi';
+import useTaskRange from './useTaskRange';
 
 const localizer = momentLocalizer(moment);
 
@@ -175,12 +176,14 @@ const EventTooltip = styled.div`
   max-width: 200px;
 `;
 
-const CalendarPanel = ({ tasks, onTaskSelect, selectedTask }) => {
+const CalendarPanel = ({ tasks, taskChange, onTaskSelect, selectedTask }) => {
   const [view, setView] = useState('month');
   const [date, setDate] = useState(new Date());
+  // Календарь грузит с сервера только задачи видимого окна
+  const calendar = useTaskRange(date, view, taskChange);
 
   // Преобразуем задачи в события для календаря
-  const events = tasks.map(task => ({
+  const events = calendar.tasks.map(task => ({
     id: task.id,
     title: task.title,
     start: task.dueDate || new Date(),
@@ -190,7 +193,7 @@ const CalendarPanel = ({ tasks, onTaskSelect, selectedTask }) => {
   }));
 
   const handleSelectEvent = (event) => {
-    onTaskSelect(event.resource);
+    onTaskSelect(tasks.find(task => task.id === event.resource.id) || event.resource);
   };
 
   const handleSelectSlot = (slotInfo) => {
@@ -6,6 +6,8 @@ import 'react-big-calendar/lib/css/react-big-calendar.css';
 import 'moment/locale/ru';
 import { FiCalendar, FiChevronLeft, FiChevronRight, FiPlus, FiList } from 'react-icons/fi';
 import TaskItem from './TaskItem';
+import useTaskRange from './useTaskRange';
+import useDashboardSummary from './useDashboardSummary';
 
 // Устанавливаем русскую локаль для moment
 moment.locale('ru');
@@ -339,17 +341,24 @@ const CustomToolbar = ({ label, onNavigate, onView, currentDate, onDateSelect })
   );
 };
 
-const Dashboard = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onTaskUpdate }) => {
+const Dashboard = ({ tasks, taskChange, onTaskSelect, selectedTask, onCreateTask, user, onTaskUpdate }) => {
   const [view, setView] = useState('month');
   const [date, setDate] = useState(new Date());
+  // Календарь грузит с сервера только задачи видимого окна
+  const calendar = useTaskRange(date, view, taskChange);
+  // Сводка считается на сервере
+  const summary = useDashboardSummary(taskChange);
 
   const handleDateSelect = (selectedDate) => {
     setDate(selectedDate);
   };
 
 
+  // Полная задача из общего списка, если она уже загружена
+  const fullTask = (task) => tasks.find(item => item.id === task.id) || task;
+
   // Преобразуем задачи в события для календаря
-  const events = tasks.map(task => {
+  const events = calendar.tasks.map(task => {
     // Если нет даты начала, используем дату создания
     const startDate = task.startDate ? new Date(task.startDate) : new Date(task.createdAt);
     // Если нет даты окончания, используем дату начала + 1 день
@@ -369,22 +378,18 @@ const Dashboard = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onTa
   });
 
   const handleSelectEvent = (event) => {
-    onTaskSelect(event.resource);
+    onTaskSelect(fullTask(event.resource));
   };
 
   const handleSelectSlot = (slotInfo) => {
     const selectedDate = slotInfo.start;
-    const tasksOnDate = tasks.filter(task => {
-      const taskStartDate = task.startDate ? new Date(task.startDate) : new Date(task.createdAt);
-      const taskDueDate = task.dueDate ? new Date(task.dueDate) : new Date(task.createdAt);
-      
-      // Проверяем, попадает ли выбранная дата в диапазон задачи
-      return selectedDate >= taskStartDate && selectedDate <= taskDueDate;
-    });
+    // Задачи дня уже разложены сервером по дням окна
+    const taskIds = calendar.days[moment(selectedDate).format('YYYY-MM-DD')] || [];
+    const tasksOnDate = calendar.tasks.filter(task => taskIds.includes(task.id));
 
     if (tasksOnDate.length > 0) {
       // Если есть задачи на эту дату, показываем первую
-      onTaskSelect(tasksOnDate[0]);
+      onTaskSelect(fullTask(tasksOnDate[0]));
     } else {
       // Если нет задач, создаем новую с выбранной датой
       onCreateTask(selectedDate);
@@ -453,11 +458,14 @@ const Dashboard = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onTa
     };
   };
 
-  // Получаем последние 5 активных задач
-  const recentTasks = tasks
-    .filter(task => task.status === 'active')
-    .sort((a, b) => new Date(b.createdAt) - new Date(a.createdAt))
-    .slice(0, 5);
+  // Последние активные задачи из сводки
+  const recentTasks = (summary ? summary.recent : []).map(task => ({
+    ...task,
+    startDate: task.startDate ? new Date(task.startDate) : null,
+    dueDate: task.dueDate ? new Date(task.dueDate) : null,
+    createdAt: new Date(task.createdAt),
+    updatedAt: new Date(task.updatedAt)
+  }));
 
   // Определяем текст фильтрации в зависимости от роли
   const getFilterText = () => {
@@ -487,6 +495,11 @@ const Dashboard = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onTa
             {getFilterText()}
           </DashboardSubtitle>
         )}
+        {summary && (
+          <DashboardSubtitle style={{ fontSize: '13px', marginTop: '5px' }}>
+            Активных: {summary.counts.byStatus.active || 0} · Просрочено: {summary.overdue.count} · Скоро срок: {summary.dueSoon.count}
+          </DashboardSubtitle>
+        )}
       </DashboardHeader>
 
       <DashboardContent>
@@ -590,7 +603,7 @@ const Dashboard = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onTa
                   key={task.id}
                   task={task}
                   isSelected={selectedTask?.id === task.id}
-                  onClick={() => onTaskSelect(task)}
+                  onClick={() => onTaskSelect(fullTask(task))}
                 />
               ))
             )}
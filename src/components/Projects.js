@@ -1,8 +1,9 @@
-import React, { useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import styled from 'styled-components';
 import { FiFolder, FiPlus, FiSearch, FiFilter, FiCalendar, FiFlag, FiSettings, FiHome } from 'react-icons/fi';
 import TaskItem from './TaskItem';
 import ProjectManager from './ProjectManager';
+import useDashboardSummary from './useDashboardSummary';
 
 const ProjectsContainer = styled.div`
   display: flex;
@@ -197,6 +198,27 @@ const TasksList = styled.div`
   padding: 0 20px 20px;
 `;
 
+const LoadMore = styled.div`
+  display: flex;
+  justify-content: center;
+  padding: 16px 0 0;
+`;
+
+const LoadMoreButton = styled.button`
+  padding: 8px 16px;
+  border: 1px solid #ddd;
+  border-radius: 6px;
+  background: white;
+  color: #666;
+  font-size: 13px;
+  cursor: pointer;
+
+  &:disabled {
+    cursor: default;
+    opacity: 0.6;
+  }
+`;
+
 const EmptyState = styled.div`
   text-align: center;
   padding: 40px 20px;
@@ -259,11 +281,29 @@ const StatLabel = styled.div`
   color: #666;
 `;
 
-const Projects = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onNavigateToHome, onTaskUpdate }) => {
+const Projects = ({ tasks, taskChange, hasMoreTasks, loadingMoreTasks, onLoadMoreTasks, onTaskSelect, selectedTask,
+                    onCreateTask, user, onNavigateToHome, onTaskUpdate }) => {
   const [activeTab, setActiveTab] = useState('tasks');
   const [searchTerm, setSearchTerm] = useState('');
   const [priorityFilter, setPriorityFilter] = useState('all');
   const [statusFilter, setStatusFilter] = useState('all');
+  const summary = useDashboardSummary(taskChange);
+  const tasksListRef = useRef(null);
+  const loadMoreRef = useRef(null);
+
+  // Следующая страница задач подгружается, когда конец списка становится видимым
+  useEffect(() => {
+    if (!hasMoreTasks || !loadMoreRef.current || !window.IntersectionObserver) {
+      return undefined;
+    }
+    const observer = new IntersectionObserver(entries => {
+      if (entries.some(entry => entry.isIntersecting)) {
+        onLoadMoreTasks();
+      }
+    }, { root: tasksListRef.current, rootMargin: '200px' });
+    observer.observe(loadMoreRef.current);
+    return () => observer.disconnect();
+  }, [hasMoreTasks, onLoadMoreTasks, activeTab]);
 
   // Сортируем задачи по дате создания (от новых к старым)
   const sortedTasks = tasks
@@ -276,11 +316,12 @@ const Projects = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onNav
     })
     .sort((a, b) => new Date(b.createdAt) - new Date(a.createdAt));
 
-  // Статистика
-  const totalTasks = tasks.length;
-  const activeTasks = tasks.filter(task => task.status === 'active').length;
-  const completedTasks = tasks.filter(task => task.status === 'completed').length;
-  const archivedTasks = tasks.filter(task => task.status === 'archived').length;
+  // Статистика по всем задачам пользователя: список загружен лишь частично
+  const byStatus = summary ? summary.counts.byStatus : {};
+  const totalTasks = summary ? summary.counts.total : 0;
+  const activeTasks = byStatus.active || 0;
+  const completedTasks = byStatus.completed || 0;
+  const archivedTasks = byStatus.archived || 0;
 
   // Определяем текст фильтрации в зависимости от роли
   const getFilterText = () => {
@@ -466,8 +507,8 @@ const Projects = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onNav
             )}
           </PanelHeader>
 
-          <TasksList>
-            {sortedTasks.length === 0 ? (
+          <TasksList ref={tasksListRef}>
+            {sortedTasks.length === 0 && !hasMoreTasks ? (
               <EmptyState>
                 <EmptyIcon>📋</EmptyIcon>
                 <EmptyText>
@@ -488,6 +529,13 @@ const Projects = ({ tasks, onTaskSelect, selectedTask, onCreateTask, user, onNav
                 />
               ))
             )}
+            {hasMoreTasks && (
+              <LoadMore ref={loadMoreRef}>
+                <LoadMoreButton onClick={onLoadMoreTasks} disabled={loadingMoreTasks}>
+                  {loadingMoreTasks ? 'Загрузка...' : 'Показать еще'}
+                </LoadMoreButton>
+              </LoadMore>
+            )}
             </TasksList>
             </ProjectsPanel>
           </>
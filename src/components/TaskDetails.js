@@ -918,7 +918,7 @@ const TaskDetails = ({ task, onTaskUpdate }) => {
                 {screenshots.map((screenshot) => (
                   <ScreenshotItem key={screenshot.id}>
                     <ScreenshotImage
-                      src={`/api/files/${screenshot.id}/download`}
+                      src={`/api/files/${screenshot.id}/download?size=thumb`}
                       alt={screenshot.originalFilename}
                     />
                     <ScreenshotActions>
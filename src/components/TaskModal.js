@@ -1197,7 +1197,7 @@ const TaskModal = ({ task, onClose, onTaskUpdate, onTaskDelete }) => {
                           onClick={() => handleScreenshotClick(screenshot)}
                         >
                           <ScreenshotImage 
-                            src={`/api/files/${screenshot.id}/download`}
+                            src={`/api/files/${screenshot.id}/download?size=thumb`}
                             alt={title || 'Скриншот'}
                             onError={(e) => {
                               e.target.style.display = 'none';
@@ -1263,7 +1263,7 @@ const TaskModal = ({ task, onClose, onTaskUpdate, onTaskDelete }) => {
             </ScreenshotModalClose>
             
             <ScreenshotModalImage 
-              src={`/api/files/${selectedScreenshot.id}/download`}
+              src={`/api/files/${selectedScreenshot.id}/download?size=preview`}
               alt={selectedScreenshot.originalFilename}
             />
             
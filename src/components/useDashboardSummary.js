@@ -0,0 +1,52 @@
+import { useEffect, useRef, useState } from 'react';
+
+// Пауза перед перезагрузкой сводки после изменения задач
+const SUMMARY_REFRESH_DELAY = 1000;
+
+// Сводка задач пользователя с сервера; taskChange - последнее изменение задачи.
+// События задач приходят только из области видимости пользователя; серия изменений
+// дает одну перезагрузку сводки
+const useDashboardSummary = (taskChange) => {
+  const [summary, setSummary] = useState(null);
+  const [refreshKey, setRefreshKey] = useState(0);
+  const refreshTimer = useRef(null);
+
+  useEffect(() => {
+    if (taskChange) {
+      clearTimeout(refreshTimer.current);
+      refreshTimer.current = setTimeout(() => setRefreshKey(key => key + 1), SUMMARY_REFRESH_DELAY);
+    }
+  }, [taskChange]);
+
+  useEffect(() => () => clearTimeout(refreshTimer.current), []);
+
+  useEffect(() => {
+    let cancelled = false;
+    const loadSummary = async () => {
+      try {
+        const response = await fetch('/api/dashboard/summary', {
+          credentials: 'include'
+        });
+
+        if (!response.ok) {
+          console.error('Ошибка загрузки сводки дашборда');
+          return;
+        }
+        const data = await response.json();
+        if (!cancelled) {
+          setSummary(data);
+        }
+      } catch (error) {
+        console.error('Ошибка загрузки сводки дашборда:', error);
+      }
+    };
+    loadSummary();
+    return () => {
+      cancelled = true;
+    };
+  }, [refreshKey]);
+
+  return summary;
+};
+
+export default useDashboardSummary;
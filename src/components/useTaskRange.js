@@ -0,0 +1,91 @@
+import { useEffect, useRef, useState } from 'react';
+import moment from 'moment';
+
+// Видимое окно календаря: месяц вместе с соседними неделями, неделя или день
+const visibleRange = (date, view) => {
+  const unit = view === 'month' ? 'month' : view === 'week' ? 'week' : 'day';
+  const start = moment(date).startOf(unit);
+  const end = moment(date).endOf(unit);
+  if (view === 'month') {
+    start.startOf('week');
+    end.endOf('week');
+  }
+  return { from: start.format('YYYY-MM-DD'), to: end.format('YYYY-MM-DD') };
+};
+
+// Пауза перед перезагрузкой окна: серия изменений задач дает один запрос
+const REFRESH_DELAY = 500;
+
+const dayOf = value => (value ? moment(value).format('YYYY-MM-DD') : null);
+
+// Может ли изменение задачи затронуть окно: задача уже в окне или ее новые даты
+// пересекаются с ним. В частичном изменении неизвестная граница считается открытой
+const touchesWindow = ({ id, fields }, taskIds, from, to) => {
+  if (taskIds.has(id)) {
+    return true;
+  }
+  const start = dayOf(fields.startDate || fields.createdAt);
+  const end = 'dueDate' in fields ? dayOf(fields.dueDate) || start : null;
+  if (!start && !end) {
+    return false;
+  }
+  const [lower, upper] = start && end ? [start, end].sort() : [start, end];
+  return (!upper || upper >= from) && (!lower || lower <= to);
+};
+
+// Задачи видимого окна календаря с сервера; taskChange - последнее изменение задачи
+// ({ id, fields }), окно перезагружается, только если оно его касается
+const useTaskRange = (date, view, taskChange) => {
+  const [range, setRange] = useState({ tasks: [], days: {} });
+  const [refreshKey, setRefreshKey] = useState(0);
+  const refreshTimer = useRef(null);
+  const { from, to } = visibleRange(date, view);
+
+  useEffect(() => {
+    if (taskChange && touchesWindow(taskChange, new Set(range.tasks.map(task => task.id)), from, to)) {
+      clearTimeout(refreshTimer.current);
+      refreshTimer.current = setTimeout(() => setRefreshKey(key => key + 1), REFRESH_DELAY);
+    }
+  }, [taskChange]);
+
+  useEffect(() => () => clearTimeout(refreshTimer.current), []);
+
+  useEffect(() => {
+    let cancelled = false;
+    const loadRange = async () => {
+      try {
+        const params = new URLSearchParams({ from, to });
+        const response = await fetch(`/api/tasks/range?${params}`, {
+          credentials: 'include'
+        });
+
+        if (!response.ok) {
+          console.error('Ошибка загрузки задач календаря');
+          return;
+        }
+        const data = await response.json();
+        if (!cancelled) {
+          setRange({
+            tasks: data.tasks.map(task => ({
+              ...task,
+              startDate: task.startDate ? new Date(task.startDate) : null,
+              dueDate: task.dueDate ? new Date(task.dueDate) : null,
+              createdAt: new Date(task.createdAt)
+            })),
+            days: data.days
+          });
+        }
+      } catch (error) {
+        console.error('Ошибка загрузки задач календаря:', error);
+      }
+    };
+    loadRange();
+    return () => {
+      cancelled = true;
+    };
+  }, [from, to, refreshKey]);
+
+  return range;
+};
+
+export default useTaskRange;